@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Skill, Project, Experience, Contact, SiteVisit, SiteSettings
+from .images import thumbnail_url
+from .models import (
+    Skill, Project, Experience, Contact, SiteVisit, SiteSettings,
+    PageVisitDaily, PageVisitHourly, OutgoingEmail,
+)
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
@@ -20,7 +24,7 @@ class ProjectAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit: cover;" />', obj.image.url)
+            return format_html('<img src="{}" width="50" height="50" style="object-fit: cover;" />', thumbnail_url(obj.image, 100))
         return "-"
     image_preview.short_description = "Aperçu"
 
@@ -69,13 +73,36 @@ class ContactAdmin(admin.ModelAdmin):
         )
     priority_badge.short_description = "Priorité"
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = ['subject', 'body', 'from_email', 'recipients', 'attempts',
+                      'last_error', 'created_at', 'sent_at']
+
 @admin.register(SiteVisit)
 class SiteVisitAdmin(admin.ModelAdmin):
     list_display = ['ip_address', 'page', 'timestamp']
-    list_filter = ['timestamp', 'page']
-    search_fields = ['ip_address', 'page']
+    list_filter = ['timestamp']
+    list_select_related = ['page']
+    search_fields = ['ip_address', 'page__path']
     readonly_fields = ['ip_address', 'user_agent', 'page', 'timestamp', 'session_key']
 
+@admin.register(PageVisitDaily)
+class PageVisitDailyAdmin(admin.ModelAdmin):
+    list_display = ['date', 'page', 'count']
+    list_filter = ['date']
+    search_fields = ['page']
+    readonly_fields = ['date', 'page', 'count']
+
+@admin.register(PageVisitHourly)
+class PageVisitHourlyAdmin(admin.ModelAdmin):
+    list_display = ['hour', 'page', 'count']
+    list_filter = ['hour']
+    search_fields = ['page']
+    readonly_fields = ['hour', 'page', 'count']
+
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
     fieldsets = (
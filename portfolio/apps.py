@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'portfolio'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .instrumentation import install_thread_query_hooks
+
+        # Connexions ouvertes avant l'enregistrement du signal connection_created
+        install_thread_query_hooks()
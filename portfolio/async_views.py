@@ -0,0 +1,152 @@
+"""Versions asynchrones des pages publiques et des API de statistiques.
+
+Servies à la place de celles de views.py lorsque ASYNC_VIEWS est activé
+(serveur ASGI). Les requêtes indépendantes d'une vue sont lancées ensemble
+avec asyncio.gather et le rendu a lieu sur la boucle, une fois l'utilisateur
+et les paramètres du site chargés. L'ORM asynchrone de Django exécute encore
+le SQL dans le thread réservé à la requête HTTP : les requêtes d'une même vue
+restent successives côté base, mais la boucle sert les autres clients pendant
+ce temps, au lieu d'immobiliser un thread par requête.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, render
+
+from . import live, related, search, stats
+from .caching import cache_public_page, get_site_settings
+from .counters import view_counter
+from .models import Experience, Project, Skill
+from .views import chart_params, chart_response, filter_projects
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _render(request, template_name, context):
+    # Le contexte des templates ne doit plus rien charger depuis la base
+    request.user = await request.auser()
+    await sync_to_async(get_site_settings)(request)
+    return render(request, template_name, context)
+
+
+async def _login_redirect(request):
+    """Redirection vers la connexion si l'utilisateur est anonyme, sinon None"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    return None
+
+
+@cache_public_page
+async def home(request):
+    featured_projects, skills = await asyncio.gather(
+        _list(Project.objects.for_cards().filter(featured=True, status='completed')[:3]),
+        _list(Skill.objects.all()),
+    )
+
+    context = {
+        'featured_projects': featured_projects,
+        'skills': skills,
+    }
+    return await _render(request, 'portfolio/home.html', context)
+
+
+@cache_public_page
+async def projects(request):
+    tech_filter = request.GET.get('tech')
+    status_filter = request.GET.get('status')
+    search_query = request.GET.get('search')
+
+    ranked_ids = await sync_to_async(search.search)(search_query) if search_query else None
+    projects_list = filter_projects(
+        Project.objects.for_cards().filter(Q(status='completed') | Q(status='in_progress')),
+        tech_filter, status_filter, ranked_ids,
+    )
+
+    count, total_projects, completed_projects, technologies = await asyncio.gather(
+        projects_list.acount(),
+        Project.objects.acount(),
+        Project.objects.filter(status='completed').acount(),
+        _list(Skill.objects.all()),
+    )
+
+    # Paginator ne compte pas de façon asynchrone : il découpe le total déjà
+    # connu, puis seule la page demandée est chargée
+    paginator = Paginator(range(count), 6)  # 6 projets par page
+    page = paginator.get_page(request.GET.get('page'))
+    bottom = (page.number - 1) * paginator.per_page
+    page.object_list = await _list(projects_list[bottom:bottom + paginator.per_page])
+
+    context = {
+        'projects': page,
+        'total_projects': total_projects,
+        'completed_projects': completed_projects,
+        'technologies': technologies,
+        'current_tech': tech_filter,
+        'current_status': status_filter,
+        'current_search': search_query,
+    }
+    return await _render(request, 'portfolio/projects.html', context)
+
+
+async def project_detail(request, slug):
+    response = await _project_detail_page(request, slug)
+    if response.status_code == 200 and view_counter.incr(slug, flush=False):
+        await sync_to_async(view_counter.flush)()
+    return response
+
+
+@cache_public_page
+async def _project_detail_page(request, slug):
+    project = await aget_object_or_404(Project.objects.for_cards(), slug=slug)
+
+    context = {
+        'project': project,
+        'related_projects': await related.atop_related(project, 3),
+    }
+    return await _render(request, 'portfolio/project_detail.html', context)
+
+
+@cache_public_page
+async def about(request):
+    experiences, skills, total_projects = await asyncio.gather(
+        _list(Experience.objects.all()),
+        _list(Skill.objects.all()),
+        Project.objects.acount(),
+    )
+
+    context = {
+        'experiences': experiences,
+        'skills': skills,
+        'total_projects': total_projects,
+    }
+    return await _render(request, 'portfolio/about.html', context)
+
+
+async def api_stats(request):
+    """API pour récupérer les statistiques en temps réel"""
+    redirect = await _login_redirect(request)
+    if redirect is not None:
+        return redirect
+
+    return JsonResponse(await live.astats_snapshot())
+
+
+async def api_chart_data(request):
+    """API pour les données de graphiques (?days=7|30|90|365&granularity=day|hour)"""
+    redirect = await _login_redirect(request)
+    if redirect is not None:
+        return redirect
+
+    params = chart_params(request)
+    if params is None:
+        return JsonResponse({'error': 'Paramètres invalides'}, status=400)
+
+    series = await sync_to_async(stats.visit_series)(*params)
+    return chart_response(series, params[1])
@@ -0,0 +1,71 @@
+"""Vidage périodique des tampons en mémoire par un thread d'arrière-plan."""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlush:
+    """Appelle flush() toutes les interval() secondes dans un thread démon.
+
+    Le thread est démarré au premier besoin (start) : les écritures en attente
+    ne dépendent plus d'une prochaine requête sur un site calme, et ne sont
+    plus faites dans le thread de la requête. Les connexions ouvertes par le
+    thread sont fermées après chaque passage. BUFFER_FLUSH_THREAD=False le
+    désactive (tests, commandes).
+    """
+
+    def __init__(self, name, flush, interval):
+        self.name = name
+        self.flush = flush
+        self.interval = interval
+        self._thread = None
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not getattr(settings, 'BUFFER_FLUSH_THREAD', True) or self.interval() <= 0:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Demande un vidage immédiat au thread ; False s'il ne tourne pas"""
+        if not self.running:
+            return False
+        self._wakeup.set()
+        return True
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(max(self.interval(), 0.1))
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Échec du vidage périodique (%s)", self.name)
+            finally:
+                connections.close_all()
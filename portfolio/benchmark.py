@@ -0,0 +1,253 @@
+"""Banc d'essai des routes : jeu de données synthétique et mesures de latence.
+
+Utilisé par la commande benchmark_routes, qui l'exécute sur une base de test.
+Pour chaque route : percentiles de latence, nombre de requêtes SQL et pic
+mémoire Python (mesuré sur une requête à part, tracemalloc ralentissant
+fortement le code tracé). Les routes sont mesurées par le gestionnaire WSGI
+avec les vues synchrones, ou par le gestionnaire ASGI avec les vues
+asynchrones (asgi=True).
+"""
+import importlib
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from . import interning, related, search, stats, urls
+from .models import Experience, Project, SiteSettings, SiteVisit, Skill
+
+BROWSER_USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/126.0 Safari/537.36'
+)
+WORDS = (
+    'django api dashboard analyse temps réel recherche cache image mobile '
+    'paiement carte données rapport export sécurité automatisation plateforme'
+).split()
+
+
+def seed(projects=60, skills=20, experiences=8, visits=100000, days=365, random_seed=42):
+    """Crée un jeu de données synthétique reproductible"""
+    rng = random.Random(random_seed)
+    categories = [value for value, _ in Skill.CATEGORY_CHOICES]
+    statuses = [value for value, _ in Project.STATUS_CHOICES]
+
+    SiteSettings.objects.create(
+        name='Jean Dupont', tagline='Développeur web', bio='<p>Biographie</p>',
+        email='jean@example.com', location='Paris',
+    )
+    skill_objs = Skill.objects.bulk_create([
+        Skill(name=f'Compétence {i}', category=categories[i % len(categories)],
+              proficiency=rng.randint(30, 100), order=i)
+        for i in range(skills)
+    ])
+    # bulk_create : pas de signaux, les index sont reconstruits une seule fois
+    project_objs = Project.objects.bulk_create([
+        Project(
+            title=f'Projet {i} ' + ' '.join(rng.sample(WORDS, 2)),
+            slug=f'projet-{i}',
+            description=' '.join(rng.choices(WORDS, k=20)),
+            detailed_description='<p>' + ' '.join(rng.choices(WORDS, k=200)) + '</p>',
+            image='projects/benchmark.png',
+            status=statuses[i % len(statuses)],
+            featured=i < 6,
+            order=i,
+            views=rng.randint(0, 5000),
+        )
+        for i in range(projects)
+    ])
+    Through = Project.technologies.through
+    Through.objects.bulk_create([
+        Through(project_id=project.pk, skill_id=skill.pk)
+        for project in project_objs
+        for skill in rng.sample(skill_objs, rng.randint(1, min(6, skills)))
+    ])
+    search.rebuild_index()
+    related.rebuild_related()
+    Experience.objects.bulk_create([
+        Experience(
+            company=f'Entreprise {i}', position='Développeur', description='<p>Missions</p>',
+            start_date=date(2015 + i, 1, 1), current=i == experiences - 1, order=i,
+        )
+        for i in range(experiences)
+    ])
+    seed_visits(visits, days, rng)
+
+
+def seed_visits(count, days, rng, batch_size=10000):
+    """Insère count visites réparties sur days jours puis recalcule les agrégats"""
+    paths = ['/', '/projets/', '/a-propos/', '/contact/'] + [
+        f'/projets/projet-{i}/' for i in range(Project.objects.count())
+    ]
+    page_ids = interning.page_paths.ids_for(paths)
+    agent_ids = interning.user_agents.ids_for(
+        [BROWSER_USER_AGENT] + [f'Mozilla/5.0 Agent/{i}' for i in range(50)]
+    )
+    agents = list(agent_ids.values())
+    visitors = max(count // 20, 1)
+    now = timezone.now()
+    span = days * 86400
+
+    for start in range(0, count, batch_size):
+        SiteVisit.objects.bulk_create([
+            SiteVisit(
+                ip_address=f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}',
+                user_agent_id=rng.choice(agents),
+                page_id=page_ids[rng.choice(paths)],
+                session_key=f'session-{n}-{rng.randint(0, 3)}',
+                timestamp=now - timedelta(seconds=rng.randrange(span)),
+            )
+            for n in (rng.randrange(visitors) for _ in range(min(batch_size, count - start)))
+        ], batch_size=batch_size)
+    stats.rebuild_rollups()
+
+
+def dataset_size():
+    return {
+        'projects': Project.objects.count(),
+        'skills': Skill.objects.count(),
+        'experiences': Experience.objects.count(),
+        'site_visits': SiteVisit.objects.count(),
+    }
+
+
+def routes():
+    """(nom, méthode, URL, données POST, connexion requise)"""
+    skill = Skill.objects.order_by('pk').first()
+    project = Project.objects.order_by('pk').first()
+    projects_url = reverse('projects')
+    chart_url = reverse('api_chart_data')
+    return [
+        ('home', 'get', reverse('home'), None, False),
+        ('projects', 'get', projects_url, None, False),
+        ('projects:status', 'get', projects_url + '?status=completed', None, False),
+        ('projects:tech', 'get', f'{projects_url}?tech={skill.name if skill else ""}', None, False),
+        ('projects:search', 'get', projects_url + '?search=django+api', None, False),
+        ('projects:page', 'get', projects_url + '?page=2', None, False),
+        ('project_detail', 'get', reverse('project_detail', args=[project.slug if project else 'x']), None, False),
+        ('about', 'get', reverse('about'), None, False),
+        ('contact:post', 'post', reverse('contact'), {
+            'name': 'Banc', 'email': 'banc@example.com', 'subject': 'Mesure',
+            'message': 'Bonjour', 'priority': 'medium',
+        }, False),
+        ('dashboard', 'get', reverse('dashboard'), None, True),
+        ('api_stats', 'get', reverse('api_stats'), None, True),
+        ('api_chart_data', 'get', chart_url, None, True),
+        ('api_chart_data:year', 'get', chart_url + '?days=365', None, True),
+        ('api_chart_data:hour', 'get', chart_url + '?days=30&granularity=hour', None, True),
+    ]
+
+
+def percentile(values, p):
+    """Percentile au rang le plus proche"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def _reload_urls():
+    importlib.reload(urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def use_async_views(enabled=True):
+    """Sert les vues asynchrones (ou synchrones) le temps du bloc"""
+    try:
+        with override_settings(ASYNC_VIEWS=enabled):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def measure(client, method, url, data=None, iterations=50, warmup=5, cold=False):
+    """Mesures d'une route ; cold vide le cache avant chaque requête"""
+    send = getattr(client, method)
+    if isinstance(client, AsyncClient):
+        send = async_to_sync(send)
+
+    def request():
+        if cold:
+            cache.clear()
+        headers = {'User-Agent': BROWSER_USER_AGENT}
+        if method == 'post':
+            return send(url, data, headers=headers)
+        return send(url, headers=headers)
+
+    for _ in range(warmup):
+        request()
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': statistics.median_low(queries),
+        'queries_max': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(iterations=50, warmup=5, cold=False, only=None, asgi=False):
+    """Mesure toutes les routes (ou celles dont le nom commence par only)"""
+    staff = User.objects.filter(username='benchmark').first() or User.objects.create_user(
+        'benchmark', password='benchmark', is_staff=True,
+    )
+    client_class = AsyncClient if asgi else Client
+    anonymous, logged_in = client_class(), client_class()
+    logged_in.force_login(staff)
+
+    results = {}
+    with use_async_views(asgi):
+        for name, method, url, data, login in routes():
+            if only and not name.startswith(tuple(only)):
+                continue
+            client = logged_in if login else anonymous
+            results[name] = dict(
+                url=url, method=method.upper(),
+                **measure(client, method, url, data, iterations, warmup, cold),
+            )
+    return results
+
+
+def compare(sync_results, asgi_results):
+    """p50 des deux chemins par route et rapport sync / ASGI (> 1 : ASGI plus rapide)"""
+    return {
+        name: {
+            'sync_p50_ms': sync_results[name]['p50_ms'],
+            'asgi_p50_ms': asgi_results[name]['p50_ms'],
+            'ratio': round(sync_results[name]['p50_ms'] / asgi_results[name]['p50_ms'], 2),
+        }
+        for name in sync_results if name in asgi_results
+    }
@@ -0,0 +1,144 @@
+"""Caches applicatifs du portfolio."""
+import hashlib
+import time
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+
+from .models import SiteSettings
+
+SITE_SETTINGS_EPOCH_KEY = 'portfolio:site-settings-epoch'
+CONTENT_GENERATION_KEY = 'portfolio:content-generation'
+# Paramètres GET lus par les pages publiques : les autres n'entrent pas dans la clé
+PAGE_QUERY_PARAMS = ('tech', 'status', 'search', 'page')
+
+# Copie locale au processus, valable tant que l'époque partagée ne change pas
+# (et au plus SITE_SETTINGS_CACHE_TIMEOUT secondes)
+_site_settings = {'epoch': None, 'value': None, 'loaded': 0}
+
+
+def _current_epoch():
+    epoch = cache.get(SITE_SETTINGS_EPOCH_KEY)
+    if epoch is None:
+        cache.add(SITE_SETTINGS_EPOCH_KEY, uuid.uuid4().hex, None)
+        epoch = cache.get(SITE_SETTINGS_EPOCH_KEY)
+    return epoch
+
+
+def get_site_settings(request=None):
+    """Renvoie l'instance unique de SiteSettings (ou None) sans requête SQL.
+
+    La ligne est chargée une fois par processus et par époque de cache ;
+    lorsqu'une requête est fournie, le résultat y est aussi mémorisé. Sans
+    cache partagé, l'époque n'est pas vue des autres processus : la copie
+    locale est alors rechargée après SITE_SETTINGS_CACHE_TIMEOUT secondes.
+    """
+    if request is not None and hasattr(request, '_site_settings'):
+        return request._site_settings
+
+    epoch = _current_epoch()
+    timeout = getattr(settings, 'SITE_SETTINGS_CACHE_TIMEOUT', 60)
+    expired = timeout is not None and time.monotonic() - _site_settings['loaded'] >= timeout
+    if _site_settings['epoch'] != epoch or expired:
+        _site_settings['value'] = SiteSettings.objects.first()
+        _site_settings['epoch'] = epoch
+        _site_settings['loaded'] = time.monotonic()
+    value = _site_settings['value']
+
+    if request is not None:
+        request._site_settings = value
+    return value
+
+
+def invalidate_site_settings():
+    """Ouvre une nouvelle époque : tous les processus rechargeront la ligne"""
+    cache.set(SITE_SETTINGS_EPOCH_KEY, uuid.uuid4().hex, None)
+    _site_settings['epoch'] = None
+
+
+def content_generation():
+    """Numéro de génération du contenu public, incrémenté à chaque modification"""
+    generation = cache.get(CONTENT_GENERATION_KEY)
+    if generation is None:
+        # Repart d'une valeur jamais utilisée si la clé a été évincée
+        cache.add(CONTENT_GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(CONTENT_GENERATION_KEY)
+    return generation
+
+
+def bump_content_generation():
+    """Rend obsolètes toutes les pages mises en cache"""
+    try:
+        cache.incr(CONTENT_GENERATION_KEY)
+    except ValueError:
+        content_generation()
+
+
+def _page_variant(request):
+    # Seules les pages GET sans message flash en attente sont mises en cache
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None
+    if request.user.is_staff:
+        return 'staff'
+    if request.user.is_authenticated:
+        return 'user'
+    return 'anon'
+
+
+def _cached_page(request, variant):
+    """(clé, page en cache ou None)"""
+    params = urlencode([(name, request.GET[name]) for name in PAGE_QUERY_PARAMS if name in request.GET])
+    url = hashlib.md5(f'{request.build_absolute_uri(request.path)}?{params}'.encode()).hexdigest()
+    key = f'portfolio:page:{content_generation()}:{variant}:{url}'
+    return key, cache.get(key)
+
+
+def cache_public_page(view_func):
+    """Met en cache la page rendue, jusqu'à la prochaine modification du contenu.
+
+    La clé combine la génération du contenu, l'URL (limitée aux paramètres de
+    PAGE_QUERY_PARAMS) et la variante (anonyme, connecté ou staff). Les pages
+    expirent après PAGE_CACHE_TIMEOUT secondes : sans cache partagé, c'est ce
+    qui limite l'âge des pages servies par les autres workers.
+    S'applique aussi aux vues asynchrones.
+    """
+    if iscoroutinefunction(view_func):
+        return _cache_async_page(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        variant = _page_variant(request)
+        if variant is None:
+            return view_func(request, *args, **kwargs)
+
+        key, response = _cached_page(request, variant)
+        if response is None:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, response, getattr(settings, 'PAGE_CACHE_TIMEOUT', 60))
+        return response
+    return wrapper
+
+
+def _cache_async_page(view_func):
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # L'utilisateur paresseux ne peut pas être chargé depuis la boucle
+        request.user = await request.auser()
+        variant = _page_variant(request)
+        if variant is None:
+            return await view_func(request, *args, **kwargs)
+
+        # Génération et page lues en un seul passage par un thread
+        key, response = await sync_to_async(_cached_page)(request, variant)
+        if response is None:
+            response = await view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                await cache.aset(key, response, getattr(settings, 'PAGE_CACHE_TIMEOUT', 60))
+        return response
+    return wrapper
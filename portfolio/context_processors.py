@@ -0,0 +1,6 @@
+from .caching import get_site_settings
+
+
+def site_settings(request):
+    """Rend les paramètres du site disponibles dans tous les templates"""
+    return {'settings': get_site_settings(request)}
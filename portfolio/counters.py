@@ -0,0 +1,95 @@
+"""Compteur de vues des projets : cumul en mémoire puis écriture groupée."""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, F, Value, When
+
+from .background import PeriodicFlush
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Cumule les vues par slug et les écrit avec un seul UPDATE F('views') + n.
+
+    L'écriture a lieu au plus toutes les PROJECT_VIEWS_FLUSH_INTERVAL secondes
+    (0 = immédiatement) par un thread d'arrière-plan, réveillé par la vue qui
+    la rend due ; sans ce thread (BUFFER_FLUSH_THREAD=False), dans la requête.
+    Les vues restantes sont écrites à l'arrêt du worker. Les incréments ne sont
+    jamais perdus entre deux requêtes concurrentes : le cumul est protégé par
+    un verrou et l'UPDATE est atomique côté base.
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.background = PeriodicFlush('project-views-flush', self.flush, lambda: self.flush_interval)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'PROJECT_VIEWS_FLUSH_INTERVAL', 30)
+
+    def incr(self, slug, amount=1, flush=True):
+        """Compte une vue ; avec flush=False, l'écriture due (si le thread
+        d'arrière-plan ne s'en charge pas) est laissée à l'appelant (vues
+        asynchrones) et signalée par la valeur renvoyée"""
+        with self._lock:
+            self._counts[slug] += amount
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        self.background.start()
+        if due and self.background.wake():
+            due = False
+        if due and flush:
+            self.flush()
+        return due
+
+    def pending(self, slug):
+        with self._lock:
+            return self._counts[slug]
+
+    def reset(self):
+        """Abandonne les vues en attente (tests)"""
+        with self._lock:
+            self._counts = Counter()
+            self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Écrit les vues cumulées et renvoie le nombre de projets mis à jour"""
+        with self._lock:
+            counts = self._counts
+            self._counts = Counter()
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+
+        from .models import Project
+
+        increment = Case(
+            *(When(slug=slug, then=Value(amount)) for slug, amount in counts.items()),
+            default=Value(0),
+        )
+        try:
+            return Project.objects.filter(slug__in=list(counts)).update(views=F('views') + increment)
+        except Exception:
+            logger.exception("Échec de l'écriture des vues de %d projets", len(counts))
+            with self._lock:
+                self._counts.update(counts)
+            return 0
+
+
+view_counter = ViewCounter()
+
+
+def _flush_on_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        logger.exception("Échec du vidage des vues à l'arrêt")
+
+
+atexit.register(_flush_on_exit)
@@ -0,0 +1,142 @@
+"""Données du dashboard : comptes groupés par table, requêtes lancées en parallèle.
+
+Les comptes d'une table reviennent en une seule requête par agrégation
+conditionnelle (Count(filter=Q(...))) ; les listes (projets les plus vus,
+messages récents, pages populaires) suivent les index. Ces requêtes
+indépendantes s'exécutent ensemble dans un pool de DASHBOARD_WORKERS threads
+(chacun avec sa connexion) : le temps d'attente est celui de la plus lente,
+pas leur somme. Le résultat assemblé reste DASHBOARD_CACHE_TIMEOUT secondes
+en cache.
+
+Chaque tâche s'exécute dans une copie du contexte de la requête HTTP :
+l'inspecteur de querycheck actif y relève aussi ses requêtes, et leur temps
+SQL est ajouté aux mesures de la requête. Les connexions des threads suivent
+CONN_MAX_AGE : chaque processus peut garder jusqu'à DASHBOARD_WORKERS
+connexions persistantes de plus, à prévoir dans la limite du serveur de base
+de données (ou DASHBOARD_WORKERS=1 pour tout exécuter dans la requête).
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.db.models import Count, Q
+
+from . import stats
+from .instrumentation import RequestMetrics, current_metrics, measure
+from .models import Contact, Project
+
+CACHE_KEY = 'portfolio:dashboard'
+LIST_SIZE = 5
+
+
+def project_counts():
+    return Project.objects.aggregate(total_projects=Count('id'))
+
+
+def top_projects():
+    return {'top_projects': list(Project.objects.order_by('-views')[:LIST_SIZE])}
+
+
+def message_counts():
+    return Contact.objects.aggregate(
+        total_messages=Count('id'),
+        unread_messages=Count('id', filter=Q(read=False)),
+    )
+
+
+def recent_messages():
+    return {'recent_messages': list(Contact.objects.order_by('-created_at')[:LIST_SIZE])}
+
+
+def visit_totals():
+    visits = stats.visit_totals()
+    return {
+        'visits_today': visits['today'],
+        'visits_week': visits['week'],
+        'visits_month': visits['month'],
+    }
+
+
+def popular_pages():
+    return {'popular_pages': list(stats.popular_pages(LIST_SIZE))}
+
+
+def unique_visitors():
+    # Visiteurs et sessions uniques (estimations)
+    return {'unique_visitors': stats.unique_totals()}
+
+
+QUERIES = (
+    project_counts, top_projects, message_counts, recent_messages,
+    visit_totals, popular_pages, unique_visitors,
+)
+
+_executor = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers):
+    """Pool du processus, recréé si DASHBOARD_WORKERS a changé"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dashboard')
+            _executor_workers = workers
+        return _executor
+
+
+def _run_query(query):
+    # Connexion du thread gérée comme pour une requête HTTP (CONN_MAX_AGE)
+    close_old_connections()
+    try:
+        # Mesures propres à la tâche, cumulées ensuite dans celles de la requête
+        with measure(RequestMetrics()) as metrics:
+            return query(), metrics
+    finally:
+        close_old_connections()
+
+
+def collect():
+    """Assemble les données du dashboard, requêtes en parallèle si possible"""
+    workers = getattr(settings, 'DASHBOARD_WORKERS', 4)
+    # Dans une transaction (ATOMIC_REQUESTS, tests), les connexions des autres
+    # threads ne verraient pas son état : tout s'exécute alors ici
+    if workers > 1 and not connection.in_atomic_block:
+        executor = _get_executor(workers)
+        # Une copie du contexte par tâche : l'inspecteur de la requête y reste actif
+        futures = [
+            executor.submit(contextvars.copy_context().run, _run_query, query) for query in QUERIES
+        ]
+        results = [future.result() for future in futures]
+        request_metrics = current_metrics()
+        if request_metrics is not None:
+            # Temps SQL cumulé des threads, pour Server-Timing et les histogrammes
+            for _, metrics in results:
+                request_metrics.db_time += metrics.db_time
+                request_metrics.db_queries += metrics.db_queries
+        parts = [part for part, _ in results]
+    else:
+        parts = [query() for query in QUERIES]
+
+    payload = {}
+    for part in parts:
+        payload.update(part)
+    return payload
+
+
+def dashboard_context():
+    payload = cache.get(CACHE_KEY)
+    if payload is None:
+        payload = collect()
+        cache.set(CACHE_KEY, payload, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 10))
+    return payload
+
+
+def invalidate_dashboard():
+    cache.delete(CACHE_KEY)
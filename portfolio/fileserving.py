@@ -0,0 +1,149 @@
+"""Service de fichiers : streaming, requêtes conditionnelles et Range."""
+import io
+import re
+import zlib
+
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Renvoie (début, fin) inclus pour un en-tête Range simple, ou None.
+
+    Les plages multiples ou mal formées sont ignorées (réponse complète),
+    une plage hors du fichier lève RangeNotSatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = min(int(end), size - 1) if end else size - 1
+    if end < start:
+        return None
+    return start, end
+
+
+def _iter_range(fileobj, start, length):
+    try:
+        fileobj.seek(start)
+        while length > 0:
+            chunk = fileobj.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def _range_applies(request, etag, last_modified):
+    # If-Range : la plage n'est servie que si le fichier n'a pas changé
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return last_modified is not None and parse_http_date_safe(if_range) == last_modified
+
+
+def serve_file(request, open_file, size, content_type, etag, last_modified=None,
+               filename=None, as_attachment=False, extra_headers=None):
+    """Sert un fichier en streaming avec ETag, Last-Modified, 304 et Range.
+
+    open_file est un callable renvoyant un fichier binaire ouvert : il n'est
+    appelé que si le contenu doit réellement être envoyé.
+    """
+    headers = {'ETag': etag, 'Accept-Ranges': 'bytes'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    headers.update(extra_headers or {})
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and request.method in ('GET', 'HEAD') and _range_applies(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(
+            open_file(), content_type=content_type,
+            as_attachment=as_attachment, filename=filename or '',
+        )
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _iter_range(open_file(), start, end - start + 1),
+            status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        if filename:
+            # Même en-tête que FileResponse (échappement et filename* RFC 5987)
+            response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def field_file_metadata(field_file):
+    """(taille, date de modification en timestamp ou None, ETag) d'un FieldFile"""
+    storage = field_file.storage
+    size = field_file.size
+    try:
+        last_modified = int(storage.get_modified_time(field_file.name).timestamp())
+    except (NotImplementedError, OSError):
+        last_modified = None
+    etag = '"%x-%x-%x"' % (zlib.crc32(field_file.name.encode()), size, last_modified or 0)
+    return size, last_modified, etag
+
+
+def serve_field_file(request, field_file, content_type, filename=None,
+                     as_attachment=False, cache_max_size=0):
+    """Sert un FileField ; les fichiers jusqu'à cache_max_size octets sont gardés
+    en cache pour éviter de relire le stockage tant qu'ils ne changent pas."""
+    size, last_modified, etag = field_file_metadata(field_file)
+
+    def open_file():
+        if size <= cache_max_size:
+            key = 'portfolio:file:' + etag.strip('"')
+            content = cache.get(key)
+            if content is None:
+                with field_file.storage.open(field_file.name, 'rb') as f:
+                    content = f.read()
+                cache.set(key, content, None)
+            return io.BytesIO(content)
+        return field_file.storage.open(field_file.name, 'rb')
+
+    return serve_file(
+        request, open_file, size, content_type, etag, last_modified,
+        filename=filename, as_attachment=as_attachment,
+    )
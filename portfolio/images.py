@@ -0,0 +1,190 @@
+"""Déclinaisons responsives des images (plusieurs largeurs et formats).
+
+Chaque image envoyée est déclinée en AVIF (si Pillow le supporte), WebP et
+JPEG pour les largeurs IMAGE_DERIVATIVE_WIDTHS, sans agrandissement. Les
+fichiers sont écrits dans le stockage des médias sous derivatives/, avec un
+manifeste JSON lu par la balise {% responsive_image %}. La génération tourne
+dans un pool de threads en arrière-plan après l'enregistrement du modèle.
+"""
+import io
+import json
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .caching import bump_content_generation
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+DEFAULT_WIDTHS = (320, 640, 960, 1280)
+MISSING_MANIFEST_TIMEOUT = 300
+CONTENT_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+SAVE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def output_formats():
+    """Formats générés, du plus compact au plus compatible"""
+    Image.init()
+    return [fmt for fmt in ('avif', 'webp', 'jpeg') if SAVE_OPTIONS[fmt]['format'] in Image.SAVE]
+
+
+def widths_for(original_width):
+    """Largeurs à générer pour une image : jamais plus larges que l'original"""
+    widths = sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS))
+    result = [w for w in widths if w < original_width]
+    largest = min(original_width, widths[-1])
+    if largest not in result:
+        result.append(largest)
+    return result
+
+
+def resize(image, width, height=None):
+    """Redimensionne à la largeur donnée, ou recadre au centre sur width x height"""
+    if height:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    if width >= image.width:
+        return image
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def encode(image, fmt):
+    """Encode une image Pillow et renvoie les octets"""
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # Le JPEG n'a pas de transparence : fond blanc
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, **SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def open_image(storage, name):
+    """Ouvre une image du stockage, orientée selon ses données EXIF"""
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    return ImageOps.exif_transpose(image)
+
+
+def _manifest_name(name):
+    return posixpath.join(DERIVATIVES_DIR, name + '.json')
+
+
+def _cache_key(name):
+    return 'portfolio:derivatives:' + name
+
+
+def generate_derivatives(name, storage=default_storage, force=False):
+    """Génère les déclinaisons d'une image et renvoie son manifeste"""
+    manifest_name = _manifest_name(name)
+    if not force and storage.exists(manifest_name):
+        return get_manifest(name, storage)
+
+    image = open_image(storage, name)
+    stem = posixpath.join(DERIVATIVES_DIR, posixpath.splitext(name)[0])
+    manifest = {'width': image.width, 'height': image.height, 'formats': {}}
+    for width in widths_for(image.width):
+        resized = resize(image, width)
+        for fmt in output_formats():
+            path = f'{stem}-{width}w.{fmt}'
+            if storage.exists(path):
+                storage.delete(path)
+            path = storage.save(path, ContentFile(encode(resized, fmt)))
+            manifest['formats'].setdefault(fmt, []).append([width, path])
+
+    if storage.exists(manifest_name):
+        storage.delete(manifest_name)
+    storage.save(manifest_name, ContentFile(json.dumps(manifest).encode()))
+    cache.set(_cache_key(name), manifest, None)
+    return manifest
+
+
+def get_manifest(name, storage=default_storage):
+    """Manifeste des déclinaisons d'une image, ou None si pas encore générées"""
+    manifest = cache.get(_cache_key(name))
+    if manifest is None:
+        try:
+            with storage.open(_manifest_name(name), 'rb') as f:
+                manifest = json.loads(f.read())
+        except (OSError, ValueError):
+            # Absence mémorisée brièvement (génération par un autre processus)
+            cache.set(_cache_key(name), False, MISSING_MANIFEST_TIMEOUT)
+            return None
+        cache.set(_cache_key(name), manifest, None)
+    return manifest or None
+
+
+def srcset(manifest, fmt, storage=default_storage):
+    return ', '.join(f'{storage.url(path)} {width}w' for width, path in manifest['formats'][fmt])
+
+
+def thumbnail_url(field_file, width=320):
+    """URL de la plus petite déclinaison couvrant width, sinon de l'original"""
+    manifest = get_manifest(field_file.name, field_file.storage)
+    if not manifest:
+        return field_file.url
+    fmt = 'webp' if 'webp' in manifest['formats'] else 'jpeg'
+    candidates = manifest['formats'][fmt]
+    width, path = next((c for c in candidates if c[0] >= width), candidates[-1])
+    return field_file.storage.url(path)
+
+
+class DerivativePool:
+    """Pool de threads générant les déclinaisons en arrière-plan.
+
+    Une image déjà en file n'est pas ajoutée une seconde fois. Une fois les
+    déclinaisons prêtes, les pages publiques en cache sont invalidées pour
+    qu'elles référencent les nouveaux fichiers.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+                    thread_name_prefix='derivatives',
+                )
+            return self._executor
+
+    def schedule(self, name, force=False):
+        with self._lock:
+            if name in self._pending:
+                return None
+            self._pending.add(name)
+        return self.executor.submit(self._run, name, force)
+
+    def _run(self, name, force):
+        try:
+            generate_derivatives(name, force=force)
+            bump_content_generation()
+        except Exception:
+            logger.exception("Échec de la génération des déclinaisons de %s", name)
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+
+
+derivative_pool = DerivativePool()
@@ -0,0 +1,258 @@
+"""Instrumentation des requêtes : temps SQL, rendu des templates et durée totale.
+
+RequestTimingMiddleware mesure chaque requête, publie les durées dans
+l'en-tête Server-Timing et les agrège par vue dans des histogrammes en
+mémoire (par processus), exposés au format texte Prometheus par
+api/metrics/. Chaque réponse ne couvre que le worker qui l'a servie : avec
+plusieurs workers, chacun doit être interrogé séparément (ou les séries
+additionnées côté Prometheus). Le temps de rendu est mesuré par TimedDjangoTemplates, moteur
+de templates à déclarer dans TEMPLATES ; il inclut les requêtes SQL exécutées
+pendant le rendu (querysets paresseux).
+
+Les requêtes SQL sont relevées par record_query, installé sur chaque
+connexion à son ouverture : les connexions sont propres à chaque thread, et
+sous ASGI l'ORM exécute le SQL dans le thread de sync_to_async, qui hérite
+du contexte (ContextVar) de la requête HTTP.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+# Bornes des histogrammes, en secondes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('start', 'db_time', 'db_queries', 'template_time')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Enveloppe connection.execute_wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+def current_metrics():
+    """Mesures de la requête en cours, ou None hors requête"""
+    return _current.get()
+
+
+@contextmanager
+def measure(metrics):
+    """Relève dans metrics les requêtes SQL exécutées dans le bloc"""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(connection, wrapper):
+    """Applique wrapper à toutes les requêtes de la connexion, sans fin"""
+    if wrapper not in connection.execute_wrappers:
+        # En tête : execute_wrapper() retire toujours le dernier élément
+        connection.execute_wrappers.insert(0, wrapper)
+
+
+def install_query_hooks(connection):
+    from .querycheck import inspect_query
+
+    install_execute_wrapper(connection, record_query)
+    install_execute_wrapper(connection, inspect_query)
+
+
+def install_thread_query_hooks():
+    """Installe les relevés sur les connexions déjà ouvertes du thread courant"""
+    for connection in connections.all(initialized_only=True):
+        install_query_hooks(connection)
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Moteur Django dont les templates mesurent leur durée de rendu"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class Histogram:
+    """Histogramme cumulatif par jeu d'étiquettes, à la manière de Prometheus"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: (list(counts), count, total) for labels, (counts, count, total) in self._values.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, count, total) in sorted(self.snapshot().items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{_labels(labels + (("le", bound),))} {bucket_count}')
+            lines.append(f'{self.name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{self.name}_sum{_labels(labels)} {total}')
+            lines.append(f'{self.name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+REQUEST_DURATION = Histogram(
+    'portfolio_request_duration_seconds',
+    "Durée totale des requêtes par vue (processus interrogé uniquement)",
+    DURATION_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'portfolio_request_db_seconds',
+    "Temps passé en base de données par requête (processus interrogé uniquement)",
+    DURATION_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'portfolio_request_db_queries',
+    "Nombre de requêtes SQL par requête (processus interrogé uniquement)",
+    QUERY_BUCKETS,
+)
+TEMPLATE_DURATION = Histogram(
+    'portfolio_request_template_seconds',
+    "Temps de rendu des templates par requête (processus interrogé uniquement)",
+    DURATION_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_DURATION, DB_DURATION, DB_QUERIES, TEMPLATE_DURATION)
+
+
+def render_metrics():
+    """Toutes les métriques au format texte Prometheus"""
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    # Les URL non résolues sont regroupées pour borner le nombre de séries
+    return match.view_name if match else '<unresolved>'
+
+
+def server_timing(metrics, total):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} req. SQL"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+class RequestTimingMiddleware:
+    """Mesure chaque requête ; à placer en tête de MIDDLEWARE"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.start
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = server_timing(metrics, total)
+
+        labels = {'view': _view_name(request), 'method': request.method}
+        REQUEST_DURATION.observe(dict(labels, status=f'{response.status_code // 100}xx'), total)
+        DB_DURATION.observe(labels, metrics.db_time)
+        DB_QUERIES.observe(labels, metrics.db_queries)
+        TEMPLATE_DURATION.observe(labels, metrics.template_time)
+        return response
+
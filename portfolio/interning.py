@@ -0,0 +1,118 @@
+"""Dictionnaires des chemins de page et user agents référencés par SiteVisit.
+
+Chaque valeur distincte est stockée une seule fois, identifiée par son
+empreinte SHA-1 ; un cache LRU en mémoire évite de la rechercher en base à
+chaque écriture de visites. Si l'empreinte est déjà prise par une autre
+valeur (collision), la valeur préfixée par un rang est hachée à son tour.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def value_hash(value, attempt=0):
+    if attempt:
+        value = f'{attempt}:{value}'
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Interner:
+    """Associe une valeur à l'identifiant de sa ligne dans la table de dimension"""
+
+    def __init__(self, model_name, value_field, hash_field):
+        self.model_name = model_name
+        self.value_field = value_field
+        self.hash_field = hash_field
+        self.cache = LRUCache(getattr(settings, 'VISIT_INTERNING_CACHE_SIZE', 10000))
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model('portfolio', self.model_name)
+
+    def ids_for(self, values):
+        """Identifiants des valeurs données, en créant les lignes manquantes"""
+        ids = {}
+        pending = set()
+        for value in set(values):
+            pk = self.cache.get(value)
+            if pk is None:
+                pending.add(value)
+            else:
+                ids[value] = pk
+
+        attempt = 0
+        while pending:
+            found = self._resolve(pending, attempt)
+            for value, pk in found.items():
+                ids[value] = pk
+                self.cache.set(value, pk)
+            # Empreinte occupée par une autre valeur : rang suivant
+            pending.difference_update(found)
+            attempt += 1
+        return ids
+
+    def _rows(self, digests):
+        lookup = {f'{self.hash_field}__in': digests}
+        rows = self.model.objects.filter(**lookup).values_list(self.hash_field, 'pk', self.value_field)
+        return {digest: (pk, value) for digest, pk, value in rows}
+
+    def _resolve(self, values, attempt):
+        """Identifiants des valeurs dont l'empreinte de ce rang leur appartient"""
+        candidates = {}
+        for value in values:
+            candidates.setdefault(value_hash(value, attempt), []).append(value)
+
+        rows = self._rows(list(candidates))
+        new = [digest for digest in candidates if digest not in rows]
+        if new:
+            model = self.model
+            model.objects.bulk_create(
+                [model(**{self.value_field: candidates[d][0], self.hash_field: d}) for d in new],
+                ignore_conflicts=True,
+            )
+            rows.update(self._rows(new))
+
+        found = {}
+        for digest, (pk, stored) in rows.items():
+            if stored in candidates[digest]:
+                found[stored] = pk
+        return found
+
+page_paths = Interner('PagePath', 'path', 'path_hash')
+user_agents = Interner('UserAgent', 'value', 'value_hash')
+
+
+def clear_caches():
+    page_paths.cache.clear()
+    user_agents.cache.clear()
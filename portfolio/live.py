@@ -0,0 +1,134 @@
+"""Flux temps réel des statistiques du dashboard (server-sent events).
+
+Un seul producteur par processus calcule les statistiques à chaque tick et
+diffuse les changements à tous les abonnés : la charge en base ne dépend pas
+du nombre d'onglets ouverts. Le flux nécessite un serveur ASGI : sous WSGI,
+api/stats/stream/ répond 204 et le navigateur n'ouvre pas de connexion.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import stats
+from .models import Contact, Project
+from .tracking import visit_buffer, visit_filter
+
+logger = logging.getLogger(__name__)
+
+
+def stats_snapshot():
+    """Statistiques exposées par api/stats et par le flux temps réel"""
+    return _snapshot(
+        stats.visit_totals(), stats.unique_totals(),
+        Contact.objects.filter(read=False).count(), Project.objects.count(),
+    )
+
+
+async def astats_snapshot():
+    """Version asynchrone : les groupes de requêtes sont lancés ensemble"""
+    return _snapshot(*await asyncio.gather(
+        sync_to_async(stats.visit_totals)(),
+        sync_to_async(stats.unique_totals)(),
+        Contact.objects.filter(read=False).acount(),
+        Project.objects.acount(),
+    ))
+
+
+def _snapshot(visits, uniques, unread_messages, total_projects):
+    return {
+        'visits_today': visits['today'],
+        'visits_week': visits['week'],
+        'unique_visitors': uniques['visitor'],
+        'unique_sessions': uniques['session'],
+        'unread_messages': unread_messages,
+        'total_projects': total_projects,
+        # Compteurs du suivi des visites (processus courant)
+        'tracking': {
+            'filter': visit_filter.stats(),
+            'buffer': visit_buffer.stats(),
+        },
+    }
+
+
+class StatsBroadcaster:
+    """Diffuse les statistiques à tous les abonnés d'une boucle asyncio.
+
+    Le producteur démarre avec le premier abonné et s'arrête avec le dernier.
+    Chaque abonné reçoit d'abord l'état complet, puis à chaque tick les seules
+    clés modifiées ({} si rien n'a changé). Un abonné trop lent pour suivre
+    repart de l'état complet au lieu d'accumuler des messages.
+    """
+
+    queue_size = 10
+
+    def __init__(self):
+        self._subscribers = set()
+        self._task = None
+        self.latest = None
+        self.ticks = 0
+
+    @property
+    def interval(self):
+        return getattr(settings, 'LIVE_STATS_INTERVAL', 5)
+
+    async def subscribe(self):
+        """Générateur asynchrone des messages destinés à un abonné"""
+        queue = asyncio.Queue(self.queue_size)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self.latest = None
+            self._task = loop.create_task(self._produce())
+        elif self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    async def _produce(self):
+        while True:
+            try:
+                snapshot = await sync_to_async(stats_snapshot)()
+            except Exception:
+                # Une erreur passagère (base indisponible...) ne doit pas arrêter
+                # le flux : les abonnés attendent le tick suivant
+                logger.exception("Échec du calcul des statistiques temps réel")
+                await asyncio.sleep(self.interval)
+                continue
+            previous, self.latest = self.latest, snapshot
+            self.ticks += 1
+            if previous is None:
+                delta = snapshot
+            else:
+                delta = {key: value for key, value in snapshot.items() if previous.get(key) != value}
+            for queue in list(self._subscribers):
+                if queue.full():
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(snapshot)
+                else:
+                    queue.put_nowait(delta)
+            await asyncio.sleep(self.interval)
+
+
+broadcaster = StatsBroadcaster()
+
+
+async def event_stream():
+    """Messages SSE : un évènement « stats » par changement, sinon un commentaire"""
+    yield f'retry: {int(broadcaster.interval * 1000)}\n\n'
+    async for delta in broadcaster.subscribe():
+        if delta:
+            yield f'event: stats\ndata: {json.dumps(delta, cls=DjangoJSONEncoder)}\n\n'
+        else:
+            # Maintient la connexion ouverte à travers les proxys
+            yield ': keepalive\n\n'
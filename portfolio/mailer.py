@@ -0,0 +1,77 @@
+"""Envoi par lots des emails placés dans la file OutgoingEmail."""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts):
+    """Délai avant la prochaine tentative (exponentiel, plafonné à une heure)"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def _mark_failed(email, error, now):
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_queued_mail(batch_size=50):
+    """Envoie les emails en attente sur une seule connexion SMTP.
+
+    Renvoie le couple (envoyés, échecs). Prévu pour un seul worker à la fois.
+    """
+    now = timezone.now()
+    batch = list(
+        OutgoingEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+        .order_by('next_attempt_at')[:batch_size]
+    )
+    if not batch:
+        return 0, 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning("Connexion SMTP impossible : %s", e)
+        for email in batch:
+            _mark_failed(email, e, now)
+        return 0, len(batch)
+
+    sent = failed = 0
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email or None,
+                email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as e:
+                logger.warning("Échec d'envoi de l'email %s : %s", email.pk, e)
+                _mark_failed(email, e, now)
+                failed += 1
+            else:
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.save(update_fields=['status', 'attempts', 'sent_at'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
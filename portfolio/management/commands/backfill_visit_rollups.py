@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.stats import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats de visites (par jour et par heure) depuis la table SiteVisit"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help=(
+                "Ne recalcule qu'à partir de cette date (AAAA-MM-JJ) ; par défaut depuis "
+                "la plus ancienne visite brute, les jours purgés gardant leurs agrégats"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ")
+
+        daily, hourly = rebuild_rollups(since)
+        self.stdout.write(self.style.SUCCESS(
+            f"Agrégats reconstruits : {daily} lignes journalières, {hourly} lignes horaires"
+        ))
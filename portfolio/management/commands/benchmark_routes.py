@@ -0,0 +1,101 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from portfolio import benchmark
+from portfolio.models import Project
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence (p50/p95/p99), le nombre de requêtes SQL et le pic mémoire "
+        "de chaque route sur une base de test remplie de données synthétiques"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=60)
+        parser.add_argument('--skills', type=int, default=20)
+        parser.add_argument('--experiences', type=int, default=8)
+        parser.add_argument('--visits', type=int, default=100000, help="Nombre de SiteVisit générées")
+        parser.add_argument('--days', type=int, default=365, help="Période couverte par les visites")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--cold', action='store_true', help="Vide le cache avant chaque requête")
+        parser.add_argument('--route', action='append', help="Préfixe du nom des routes à mesurer")
+        parser.add_argument(
+            '--mode', choices=['sync', 'asgi', 'compare'], default='sync',
+            help="Vues synchrones sous WSGI, asynchrones sous ASGI, ou les deux comparées",
+        )
+        parser.add_argument('--seed', type=int, default=42, help="Graine du générateur de données")
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help="Conserve la base de test et réutilise ses données au lancement suivant",
+        )
+        parser.add_argument('--output', metavar='FICHIER', help="Écrit le JSON dans un fichier")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'],
+        )
+        try:
+            started = time.perf_counter()
+            if not Project.objects.exists():
+                benchmark.seed(
+                    options['projects'], options['skills'], options['experiences'],
+                    options['visits'], options['days'], options['seed'],
+                )
+            self.stderr.write(f"Données prêtes en {time.perf_counter() - started:.1f} s")
+            dataset = benchmark.dataset_size()
+            results = {}
+            for mode in (['sync', 'asgi'] if options['mode'] == 'compare' else [options['mode']]):
+                results[mode] = benchmark.run(
+                    options['iterations'], options['warmup'], options['cold'], options['route'],
+                    asgi=mode == 'asgi',
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'commit': _git_commit(),
+                'date': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cold_cache': options['cold'],
+                'mode': options['mode'],
+                'dataset': dataset,
+            },
+        }
+        if options['mode'] == 'compare':
+            report['routes'] = results
+            report['comparison'] = benchmark.compare(results['sync'], results['asgi'])
+        else:
+            report['routes'] = results[options['mode']]
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+        else:
+            self.stdout.write(output)
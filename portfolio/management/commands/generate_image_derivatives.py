@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.images import generate_derivatives
+from portfolio.models import Project, SiteSettings
+
+
+class Command(BaseCommand):
+    help = "Génère les déclinaisons responsives des images de projets et du profil"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Régénère les déclinaisons existantes")
+
+    def handle(self, *args, **options):
+        files = [p.image for p in Project.objects.only('image') if p.image]
+        files += [s.profile_image for s in SiteSettings.objects.only('profile_image') if s.profile_image]
+
+        done = failed = 0
+        for field_file in files:
+            try:
+                generate_derivatives(field_file.name, field_file.storage, force=options['force'])
+                done += 1
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f"{field_file.name} : {exc}")
+        self.stdout.write(self.style.SUCCESS(f"{done} image(s) traitée(s), {failed} échec(s)"))
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portfolio.media import precomputed_hashes, file_hash, write_hash_manifest
+
+
+class Command(BaseCommand):
+    help = "Précalcule les empreintes (ETag) des fichiers de MEDIA_ROOT"
+
+    def handle(self, *args, **options):
+        root = Path(settings.MEDIA_ROOT)
+        previous = precomputed_hashes()
+        entries = {}
+        hashed = 0
+        for path in root.rglob('*'):
+            if not path.is_file():
+                continue
+            name = path.relative_to(root).as_posix()
+            stat = path.stat()
+            version = [stat.st_size, int(stat.st_mtime)]
+            entry = previous.get(name)
+            # Seuls les fichiers nouveaux ou modifiés sont relus
+            if not entry or entry[:2] != version:
+                entry = version + [file_hash(path)]
+                hashed += 1
+            entries[name] = entry
+        write_hash_manifest(entries)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(entries)} fichier(s) indexé(s), {hashed} empreinte(s) calculée(s)"
+        ))
@@ -0,0 +1,94 @@
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from portfolio.models import SiteVisit
+from portfolio.stats import ensure_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge les visites brutes plus anciennes que la durée de rétention, "
+        "après avoir complété les agrégats journaliers/horaires"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SITE_VISIT_RETENTION_DAYS,
+            help="Nombre de jours de visites brutes conservés",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help="Pause en secondes entre deux lots (limite la charge en production)",
+        )
+        parser.add_argument(
+            '--export', metavar='DOSSIER',
+            help="Archive les visites purgées dans un fichier JSONL compressé (gzip)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Affiche sans rien supprimer")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        cutoff = timezone.make_aware(
+            datetime.combine(today - timedelta(days=options['days']), datetime.min.time())
+        )
+        old_visits = SiteVisit.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{old_visits.count()} visite(s) antérieure(s) au {cutoff:%d/%m/%Y} à purger")
+            return
+
+        stale = ensure_rollups(cutoff)
+        if stale:
+            self.stdout.write(f"Agrégats recalculés pour {len(stale)} jour(s)")
+
+        archive = None
+        if options['export']:
+            directory = Path(options['export'])
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"sitevisits-{cutoff:%Y%m%d}-{timezone.now():%Y%m%d%H%M%S}.jsonl.gz"
+            archive = gzip.open(path, 'wt', encoding='utf-8')
+
+        deleted = 0
+        try:
+            while True:
+                # Lots courts par clé primaire : pas de verrou long sur la table
+                with transaction.atomic():
+                    ids = list(
+                        old_visits.order_by('pk').values_list('pk', flat=True)[:options['batch_size']]
+                    )
+                    if not ids:
+                        break
+                    if archive:
+                        self.export(archive, SiteVisit.objects.filter(pk__in=ids).order_by('pk'))
+                    SiteVisit.objects.filter(pk__in=ids).delete()
+                deleted += len(ids)
+                if options['pause']:
+                    time.sleep(options['pause'])
+        finally:
+            if archive:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(f"{deleted} visite(s) purgée(s)"))
+        if archive:
+            self.stdout.write(f"Archive : {path}")
+
+    def export(self, archive, visits):
+        rows = visits.values(
+            'id', 'timestamp', 'ip_address', 'session_key',
+            page_path=F('page__path'), agent=F('user_agent__value'),
+        )
+        for visit in rows:
+            visit['page'] = visit.pop('page_path')
+            visit['user_agent'] = visit.pop('agent')
+            visit['timestamp'] = visit['timestamp'].isoformat()
+            archive.write(json.dumps(visit, ensure_ascii=False) + '\n')
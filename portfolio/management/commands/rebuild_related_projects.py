@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.related import rebuild_related
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index des projets similaires"
+
+    def handle(self, *args, **options):
+        count = rebuild_related()
+        self.stdout.write(self.style.SUCCESS(f"Index reconstruit : {count} paires"))
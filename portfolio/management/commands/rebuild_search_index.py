@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des projets"
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Index reconstruit : {count} termes"))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio.mailer import send_queued_mail
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en attente dans la file OutgoingEmail"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Tourne en continu (worker) au lieu d'un seul passage",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help="Pause en secondes entre deux passages en mode --loop",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_mail(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"{sent} email(s) envoyé(s), {failed} échec(s)")
+            if not options['loop']:
+                break
+            # Enchaîne sans pause tant que des lots complets partent
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
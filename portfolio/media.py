@@ -0,0 +1,189 @@
+"""Service des fichiers envoyés (MEDIA_ROOT) en production.
+
+Remplace django.views.static.serve : ETag calculé sur le contenu (mis en
+cache par version du fichier), réponses 304 et Range via serve_file,
+compression gzip des types textuels, et délégation de l'envoi au serveur web
+avec MEDIA_SERVE_MODE :
+
+- 'django' : le fichier est envoyé en streaming par Django ;
+- 'x-accel' : en-tête X-Accel-Redirect vers MEDIA_ACCEL_PREFIX (nginx) ;
+- 'x-sendfile' : en-tête X-Sendfile avec le chemin absolu (Apache, lighttpd).
+
+Les chemins de ces en-têtes sont encodés en URL, comme l'attendent nginx et
+mod_xsendfile (XSendFileUnescape, actif par défaut).
+
+Les requêtes conditionnelles sont toujours traitées par Django, le serveur
+web n'est sollicité que pour envoyer le contenu.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import tempfile
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .fileserving import CHUNK_SIZE, serve_file
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'image/svg+xml', 'application/json', 'application/javascript',
+    'application/xml', 'application/xhtml+xml',
+)
+# En dessous, la compression ne fait rien gagner
+MIN_COMPRESS_SIZE = 1024
+HASH_MANIFEST = 'hashes.json'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache_dir():
+    return Path(_setting('MEDIA_CACHE_DIR', settings.BASE_DIR / 'cache' / 'media'))
+
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+# Empreintes précalculées par la commande hash_media, rechargées quand le
+# manifeste change
+_precomputed = {'mtime': None, 'entries': {}}
+
+
+def precomputed_hashes():
+    manifest = _cache_dir() / HASH_MANIFEST
+    try:
+        mtime = manifest.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    if mtime != _precomputed['mtime']:
+        try:
+            entries = json.loads(manifest.read_text())
+        except (OSError, ValueError):
+            entries = {}
+        _precomputed.update(mtime=mtime, entries=entries)
+    return _precomputed['entries']
+
+
+def write_hash_manifest(entries):
+    """Écrit (atomiquement) le manifeste {chemin: [taille, date, empreinte]}"""
+    directory = _cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(entries, f)
+    os.replace(tmp, directory / HASH_MANIFEST)
+
+
+def content_hash(name, path, size, mtime):
+    """Empreinte SHA-256 du fichier : précalculée, sinon calculée une fois par
+    version (taille, date) et gardée en cache"""
+    entry = precomputed_hashes().get(name)
+    if entry and entry[:2] == [size, mtime]:
+        return entry[2]
+    key = f'portfolio:media-hash:{hashlib.md5(name.encode()).hexdigest()}:{size}:{mtime}'
+    digest = cache.get(key)
+    if digest is None:
+        digest = file_hash(path)
+        cache.set(key, digest, None)
+    return digest
+
+
+def _accepts_gzip(request):
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+
+def _compressed_copy(path, digest):
+    """Copie gzip du fichier, écrite une fois dans MEDIA_CACHE_DIR"""
+    target = _cache_dir() / 'gzip' / f'{digest}.gz'
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as raw, open(path, 'rb') as src:
+                with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                        gz.write(chunk)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return target
+
+
+def _offload(mode, path, name):
+    response = HttpResponse()
+    if mode == 'x-accel':
+        prefix = _setting('MEDIA_ACCEL_PREFIX', '/protected-media/')
+        # Chemins encodés en URL : noms accentués ou avec espaces
+        response['X-Accel-Redirect'] = quote(posixpath.join(prefix, name))
+    else:
+        response['X-Sendfile'] = quote(str(path))
+    # Content-Type fixé par le serveur web d'après le fichier
+    del response['Content-Type']
+    return response
+
+
+def serve_media(request, path):
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = full_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    size, mtime = stat.st_size, int(stat.st_mtime)
+    digest = content_hash(path, full_path, size, mtime)
+    content_type, encoding = mimetypes.guess_type(str(full_path))
+    content_type = content_type or 'application/octet-stream'
+    headers = {'Cache-Control': f"public, max-age={_setting('MEDIA_CACHE_MAX_AGE', 3600)}"}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    compressible = (
+        encoding is None and size >= MIN_COMPRESS_SIZE
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+    )
+    etag = f'"{digest[:32]}"'
+    if compressible and _accepts_gzip(request):
+        full_path = _compressed_copy(full_path, digest)
+        size = full_path.stat().st_size
+        etag = f'"{digest[:32]}-gz"'
+        headers['Content-Encoding'] = 'gzip'
+
+    mode = _setting('MEDIA_SERVE_MODE', 'django')
+    if mode in ('x-accel', 'x-sendfile') and 'Content-Encoding' not in headers:
+        response = get_conditional_response(request, etag=etag, last_modified=mtime)
+        if response is None:
+            response = _offload(mode, full_path, path)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        for name, value in headers.items():
+            response[name] = value
+    else:
+        response = serve_file(
+            request, lambda: open(full_path, 'rb'), size, content_type, etag, mtime,
+            extra_headers=headers,
+        )
+    if compressible:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -1,28 +1,99 @@
-from .models import SiteVisit
+import ipaddress
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils import timezone
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .tracking import Visit, visit_buffer, visit_filter
+
+
+def _client_ip(request):
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0].strip()
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+def _visit(request):
+    ip = _client_ip(request)
+    if not ip:
+        return None
+    return Visit(
+        ip_address=ip,
+        user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
+        page=request.path[:500],
+        session_key=request.session.session_key or '',
+        timestamp=timezone.now(),
+    )
+
 
 class VisitorTrackingMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
-        
-        # Tracker uniquement les pages non-admin
-        if not request.path.startswith('/admin/'):
+
+        # Ignore admin, fichiers, erreurs, robots et préchargements
+        if visit_filter.should_record(request, response):
+            try:
+                visit = _visit(request)
+                if visit:
+                    # La visite est mise en tampon puis écrite par lots
+                    visit_buffer.add(visit)
+            except Exception:
+                pass
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        if visit_filter.should_record(request, response):
             try:
-                x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-                if x_forwarded_for:
-                    ip = x_forwarded_for.split(',')[0]
-                else:
-                    ip = request.META.get('REMOTE_ADDR')
-                
-                SiteVisit.objects.create(
-                    ip_address=ip,
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-                    page=request.path,
-                    session_key=request.session.session_key or ''
-                )
-            except:
+                visit = _visit(request)
+                # L'écriture du lot, seule opération en base, passe par un thread
+                if visit and visit_buffer.add(visit, flush=False):
+                    await sync_to_async(visit_buffer.flush)()
+            except Exception:
                 pass
-        
-        return response
\ No newline at end of file
+
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware utilisable sous ASGI sans changement de thread"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Parcourt le disque : hors de la boucle
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
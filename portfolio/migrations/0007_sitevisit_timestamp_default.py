@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_replace_twitter_with_whatsapp'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date/Heure'),
+        ),
+    ]
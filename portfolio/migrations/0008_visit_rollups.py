@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_sitevisit_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageVisitDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('page', models.CharField(max_length=500, verbose_name='Page')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Visites')),
+            ],
+            options={
+                'verbose_name': 'Visites par jour',
+                'verbose_name_plural': 'Visites par jour',
+                'ordering': ['-date', '-count'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'page'), name='unique_daily_page_visits')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PageVisitHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Heure')),
+                ('page', models.CharField(max_length=500, verbose_name='Page')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Visites')),
+            ],
+            options={
+                'verbose_name': 'Visites par heure',
+                'verbose_name_plural': 'Visites par heure',
+                'ordering': ['-hour', '-count'],
+                'constraints': [models.UniqueConstraint(fields=('hour', 'page'), name='unique_hourly_page_visits')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:42
+
+import html
+import re
+import unicodedata
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# Copie figée de portfolio.search à la date de la migration
+FIELD_WEIGHTS = (
+    ('title', 3),
+    ('description', 2),
+    ('detailed_description', 1),
+)
+MAX_TERM_LENGTH = 100
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('''
+    au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma
+    mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se
+    ses son sur ta te tes toi ton tu un une vos votre vous est sont
+    a an and are as at be by for from in is it of on or the to with
+'''.split())
+
+
+def tokenize(text):
+    text = html.unescape(strip_tags(text or ''))
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [
+        token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text)
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def project_terms(project):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(getattr(project, field)):
+            weights[token] += weight
+    return weights
+
+
+def build_index(apps, schema_editor):
+    Project = apps.get_model('portfolio', 'Project')
+    ProjectSearchTerm = apps.get_model('portfolio', 'ProjectSearchTerm')
+    ProjectSearchTerm.objects.bulk_create([
+        ProjectSearchTerm(project=project, term=term, weight=weight)
+        for project in Project.objects.all()
+        for term, weight in project_terms(project).items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Terme')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Poids')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='portfolio.project', verbose_name='Projet')),
+            ],
+            options={
+                'verbose_name': 'Terme indexé',
+                'verbose_name_plural': 'Index de recherche',
+                'constraints': [models.UniqueConstraint(fields=('term', 'project'), name='unique_project_search_term')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
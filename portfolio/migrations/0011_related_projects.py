@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_related(apps, schema_editor):
+    from portfolio.related import compute_scores
+
+    Project = apps.get_model('portfolio', 'Project')
+    RelatedProject = apps.get_model('portfolio', 'RelatedProject')
+    memberships = Project.technologies.through.objects.values_list('project_id', 'skill_id')
+    RelatedProject.objects.bulk_create([
+        RelatedProject(project_id=a, related_id=b, score=score)
+        for a, b, score in compute_scores(memberships)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_project_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Similarité')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='portfolio.project', verbose_name='Projet')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='portfolio.project', verbose_name='Projet similaire')),
+            ],
+            options={
+                'verbose_name': 'Projet similaire',
+                'verbose_name_plural': 'Projets similaires',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['project', '-score'], name='related_project_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'related'), name='unique_related_project')],
+            },
+        ),
+        migrations.RunPython(build_related, migrations.RunPython.noop),
+    ]
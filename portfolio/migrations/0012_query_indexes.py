@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_related_projects'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['read', '-created_at'], name='contact_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['-created_at'], name='contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['-start_date', 'order'], name='experience_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagevisitdaily',
+            index=models.Index(fields=['page', 'count'], name='daily_visits_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['featured', 'status', 'order', '-created_at'], name='project_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', '-featured', 'order', '-created_at'], name='project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-featured', 'order', '-created_at'], name='project_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-views'], name='project_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sitevisit',
+            index=models.Index(fields=['timestamp', 'page'], name='sitevisit_timestamp_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['category', 'order'], name='skill_ordering_idx'),
+        ),
+    ]
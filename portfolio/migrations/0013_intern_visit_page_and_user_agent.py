@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Étape 1/3 : tables de dimension et clés étrangères, remplies par 0014
+
+    dependencies = [
+        ('portfolio', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagePath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, verbose_name='Chemin')),
+                ('path_hash', models.CharField(max_length=40, unique=True, verbose_name='Empreinte SHA-1')),
+            ],
+            options={
+                'verbose_name': 'Page',
+                'verbose_name_plural': 'Pages',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.TextField(verbose_name='User Agent')),
+                ('value_hash', models.CharField(max_length=40, unique=True, verbose_name='Empreinte SHA-1')),
+            ],
+            options={
+                'verbose_name': 'User Agent',
+                'verbose_name_plural': 'User Agents',
+            },
+        ),
+        migrations.AddField(
+            model_name='sitevisit',
+            name='page_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='portfolio.pagepath'),
+        ),
+        migrations.AddField(
+            model_name='sitevisit',
+            name='agent_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='portfolio.useragent'),
+        ),
+    ]
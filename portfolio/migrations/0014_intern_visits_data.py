@@ -0,0 +1,62 @@
+import hashlib
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+
+def _digest(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def _intern(model, value_field, hash_field, values, known):
+    """Complète known (valeur -> id) pour les valeurs d'un lot"""
+    missing = {_digest(v): v for v in set(values) if v not in known}
+    if not missing:
+        return
+    model.objects.bulk_create(
+        [model(**{value_field: v, hash_field: d}) for d, v in missing.items()],
+        ignore_conflicts=True,
+    )
+    rows = model.objects.filter(**{f'{hash_field}__in': list(missing)}).values_list(hash_field, 'pk')
+    for digest, pk in rows:
+        known[missing[digest]] = pk
+
+
+def intern_visits(apps, schema_editor):
+    SiteVisit = apps.get_model('portfolio', 'SiteVisit')
+    PagePath = apps.get_model('portfolio', 'PagePath')
+    UserAgent = apps.get_model('portfolio', 'UserAgent')
+    pages, agents = {}, {}
+
+    last_pk = 0
+    while True:
+        # Lots par clé primaire, chacun dans sa propre transaction
+        with transaction.atomic():
+            batch = list(
+                SiteVisit.objects.filter(pk__gt=last_pk, page_ref__isnull=True).order_by('pk')
+                .only('pk', 'page', 'user_agent')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            _intern(PagePath, 'path', 'path_hash', (v.page for v in batch), pages)
+            _intern(UserAgent, 'value', 'value_hash', (v.user_agent for v in batch), agents)
+            for visit in batch:
+                visit.page_ref_id = pages[visit.page]
+                visit.agent_ref_id = agents[visit.user_agent]
+            SiteVisit.objects.bulk_update(batch, ['page_ref', 'agent_ref'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    # Étape 2/3 : lots validés un par un ; après une interruption, la
+    # migration reprend aux visites pas encore converties
+    atomic = False
+
+    dependencies = [
+        ('portfolio', '0013_intern_visit_page_and_user_agent'),
+    ]
+
+    operations = [
+        migrations.RunPython(intern_visits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Étape 3/3 : suppression des colonnes texte, une fois toutes les visites converties
+
+    dependencies = [
+        ('portfolio', '0014_intern_visits_data'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sitevisit',
+            name='sitevisit_timestamp_page_idx',
+        ),
+        migrations.RemoveField(
+            model_name='sitevisit',
+            name='page',
+        ),
+        migrations.RemoveField(
+            model_name='sitevisit',
+            name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='sitevisit',
+            old_name='page_ref',
+            new_name='page',
+        ),
+        migrations.RenameField(
+            model_name='sitevisit',
+            old_name='agent_ref',
+            new_name='user_agent',
+        ),
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='page',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='visits', to='portfolio.pagepath', verbose_name='Page visitée'),
+        ),
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='user_agent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='visits', to='portfolio.useragent', verbose_name='User Agent'),
+        ),
+        migrations.AddIndex(
+            model_name='sitevisit',
+            index=models.Index(fields=['timestamp', 'page'], name='sitevisit_timestamp_page_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0015_drop_visit_text_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUniqueSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('kind', models.CharField(choices=[('visitor', 'Visiteurs (IP)'), ('session', 'Sessions')], max_length=10, verbose_name='Type')),
+                ('registers', models.BinaryField(verbose_name='Registres HyperLogLog')),
+            ],
+            options={
+                'verbose_name': 'Esquisse de visiteurs uniques',
+                'verbose_name_plural': 'Esquisses de visiteurs uniques',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'kind'), name='unique_daily_sketch')],
+            },
+        ),
+    ]
@@ -1,7 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -26,10 +25,21 @@ class Skill(models.Model):
         ordering = ['category', 'order']
         verbose_name = "Compétence"
         verbose_name_plural = "Compétences"
+        indexes = [
+            models.Index(fields=['category', 'order'], name='skill_ordering_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
 
+class ProjectQuerySet(models.QuerySet):
+    def for_cards(self):
+        """Projets prêts pour les cartes : technologies préchargées et comptées (tech_count)"""
+        # L'agrégat fait perdre Meta.ordering : l'ordre est réappliqué explicitement
+        return self.prefetch_related('technologies').annotate(
+            tech_count=models.Count('technologies', distinct=True)
+        ).order_by(*self.model._meta.ordering)
+
 class Project(models.Model):
     STATUS_CHOICES = [
         ('completed', 'Terminé'),
@@ -53,17 +63,65 @@ class Project(models.Model):
     order = models.IntegerField(default=0, verbose_name="Ordre d'affichage")
     views = models.IntegerField(default=0, verbose_name="Nombre de vues")
     
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ['-featured', 'order', '-created_at']
         verbose_name = "Projet"
         verbose_name_plural = "Projets"
+        indexes = [
+            # Accueil : projets mis en avant et terminés, dans l'ordre d'affichage
+            models.Index(fields=['featured', 'status', 'order', '-created_at'], name='project_featured_idx'),
+            # Liste des projets : filtre par statut, dans l'ordre d'affichage
+            models.Index(fields=['status', '-featured', 'order', '-created_at'], name='project_status_idx'),
+            models.Index(fields=['-featured', 'order', '-created_at'], name='project_ordering_idx'),
+            # Dashboard : projets les plus vus
+            models.Index(fields=['-views'], name='project_views_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
     def increment_views(self):
-        self.views += 1
-        self.save(update_fields=['views'])
+        from .counters import view_counter
+        view_counter.incr(self.slug)
+
+class ProjectSearchTerm(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='search_terms',
+                                verbose_name="Projet")
+    term = models.CharField(max_length=100, verbose_name="Terme")
+    weight = models.PositiveIntegerField(default=1, verbose_name="Poids")
+
+    class Meta:
+        verbose_name = "Terme indexé"
+        verbose_name_plural = "Index de recherche"
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'project'], name='unique_project_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.project_id})"
+
+class RelatedProject(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='related_entries',
+                                verbose_name="Projet")
+    related = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+',
+                                verbose_name="Projet similaire")
+    score = models.FloatField(verbose_name="Similarité")
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = "Projet similaire"
+        verbose_name_plural = "Projets similaires"
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'related'], name='unique_related_project'),
+        ]
+        indexes = [
+            models.Index(fields=['project', '-score'], name='related_project_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} ~ {self.related_id} ({self.score:.2f})"
 
 class Experience(models.Model):
     company = models.CharField(max_length=200, verbose_name="Entreprise")
@@ -79,6 +137,9 @@ class Experience(models.Model):
         ordering = ['-start_date', 'order']
         verbose_name = "Expérience"
         verbose_name_plural = "Expériences"
+        indexes = [
+            models.Index(fields=['-start_date', 'order'], name='experience_ordering_idx'),
+        ]
     
     def __str__(self):
         return f"{self.position} chez {self.company}"
@@ -111,6 +172,10 @@ class Contact(models.Model):
         ordering = ['-created_at']
         verbose_name = "Message"
         verbose_name_plural = "Messages"
+        indexes = [
+            models.Index(fields=['read', '-created_at'], name='contact_read_idx'),
+            models.Index(fields=['-created_at'], name='contact_created_idx'),
+        ]
     
     def __str__(self):
         return f"Message de {self.name} - {self.subject}"
@@ -128,7 +193,47 @@ class Contact(models.Model):
         }
         return priority_classes.get(self.priority, 'bg-secondary')
 
+class OutgoingEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('sent', 'Envoyé'),
+        ('failed', 'Échec'),
+    ]
+
+    subject = models.CharField(max_length=300, verbose_name="Sujet")
+    body = models.TextField(verbose_name="Contenu")
+    from_email = models.CharField(max_length=254, blank=True, verbose_name="Expéditeur")
+    recipients = models.JSONField(default=list, verbose_name="Destinataires")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Date d'envoi")
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Email sortant"
+        verbose_name_plural = "Emails sortants"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoing_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
+    @classmethod
+    def queue(cls, subject, body, from_email, recipient_list):
+        """Place un email dans la file d'envoi (envoyé par send_queued_mail)"""
+        return cls.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or '',
+            recipients=list(recipient_list),
+        )
+
 # Signal pour envoyer un email lors de la création d'un nouveau message
+# (les emails sont mis en file d'attente, l'envoi SMTP se fait hors requête)
 @receiver(post_save, sender=Contact)
 def send_new_message_notification(sender, instance, created, **kwargs):
     if created:  # Seulement pour les nouveaux messages
@@ -154,12 +259,11 @@ Envoyé le: {instance.created_at.strftime('%d/%m/%Y à %H:%M')}
 IP: {instance.ip_address or 'Non disponible'}
             '''
             
-            send_mail(
+            OutgoingEmail.queue(
                 admin_subject,
                 admin_message,
                 settings.DEFAULT_FROM_EMAIL,
                 [settings.ADMIN_EMAIL],
-                fail_silently=True,
             )
             
             # Email de confirmation à l'expéditeur
@@ -178,33 +282,117 @@ Cordialement,
 Ulrich AMOUZOU-ABLO
             '''
             
-            send_mail(
+            OutgoingEmail.queue(
                 user_subject,
                 user_message,
                 settings.DEFAULT_FROM_EMAIL,
                 [instance.email],
-                fail_silently=True,
             )
             
         except Exception as e:
             # Log l'erreur mais ne fait pas échouer la création du message
             print(f'Erreur envoi email: {e}')
 
+class PagePath(models.Model):
+    path = models.CharField(max_length=500, verbose_name="Chemin")
+    path_hash = models.CharField(max_length=40, unique=True, verbose_name="Empreinte SHA-1")
+
+    class Meta:
+        verbose_name = "Page"
+        verbose_name_plural = "Pages"
+
+    def __str__(self):
+        return self.path
+
+class UserAgent(models.Model):
+    value = models.TextField(verbose_name="User Agent")
+    value_hash = models.CharField(max_length=40, unique=True, verbose_name="Empreinte SHA-1")
+
+    class Meta:
+        verbose_name = "User Agent"
+        verbose_name_plural = "User Agents"
+
+    def __str__(self):
+        return self.value
+
 class SiteVisit(models.Model):
     ip_address = models.GenericIPAddressField(verbose_name="Adresse IP")
-    user_agent = models.TextField(verbose_name="User Agent")
-    page = models.CharField(max_length=500, verbose_name="Page visitée")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Date/Heure")
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, related_name='visits',
+                                   verbose_name="User Agent")
+    page = models.ForeignKey(PagePath, on_delete=models.PROTECT, related_name='visits',
+                             verbose_name="Page visitée")
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="Date/Heure")
     session_key = models.CharField(max_length=100, blank=True, verbose_name="Session")
     
     class Meta:
         ordering = ['-timestamp']
         verbose_name = "Visite"
         verbose_name_plural = "Visites"
+        indexes = [
+            # Plages de dates, regroupées par page (agrégats, rétention)
+            models.Index(fields=['timestamp', 'page'], name='sitevisit_timestamp_page_idx'),
+        ]
     
     def __str__(self):
         return f"{self.ip_address} - {self.page} - {self.timestamp}"
 
+class PageVisitDaily(models.Model):
+    date = models.DateField(verbose_name="Jour")
+    page = models.CharField(max_length=500, verbose_name="Page")
+    count = models.PositiveIntegerField(default=0, verbose_name="Visites")
+
+    class Meta:
+        ordering = ['-date', '-count']
+        verbose_name = "Visites par jour"
+        verbose_name_plural = "Visites par jour"
+        indexes = [
+            # Pages les plus visitées : agrégation couverte par l'index
+            models.Index(fields=['page', 'count'], name='daily_visits_page_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'page'], name='unique_daily_page_visits'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.page} : {self.count}"
+
+class PageVisitHourly(models.Model):
+    hour = models.DateTimeField(verbose_name="Heure")
+    page = models.CharField(max_length=500, verbose_name="Page")
+    count = models.PositiveIntegerField(default=0, verbose_name="Visites")
+
+    class Meta:
+        ordering = ['-hour', '-count']
+        verbose_name = "Visites par heure"
+        verbose_name_plural = "Visites par heure"
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'page'], name='unique_hourly_page_visits'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H}h - {self.page} : {self.count}"
+
+class DailyUniqueSketch(models.Model):
+    KIND_CHOICES = [
+        ('visitor', 'Visiteurs (IP)'),
+        ('session', 'Sessions'),
+    ]
+
+    date = models.DateField(verbose_name="Jour")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Type")
+    registers = models.BinaryField(verbose_name="Registres HyperLogLog")
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = "Esquisse de visiteurs uniques"
+        verbose_name_plural = "Esquisses de visiteurs uniques"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'kind'], name='unique_daily_sketch'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.get_kind_display()}"
+
 class SiteSettings(models.Model):
     name = models.CharField(max_length=200, verbose_name="Nom complet")
     tagline = models.CharField(max_length=300, verbose_name="Slogan/Tagline")
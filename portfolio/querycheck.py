@@ -0,0 +1,220 @@
+"""Détection des requêtes N+1 et des requêtes lentes (développement et CI).
+
+Les requêtes SQL sont réduites à une empreinte (valeurs littérales et listes
+IN remplacées) : une même empreinte exécutée QUERY_CHECK_REPEAT_THRESHOLD fois
+dans une requête HTTP signale une boucle N+1, une requête plus longue que
+QUERY_CHECK_SLOW_MS est signalée comme lente. Chaque problème indique la vue,
+la ligne de template et la ligne de code qui ont déclenché la requête.
+
+QueryCheckMiddleware applique la détection à chaque requête selon
+QUERY_CHECK : 'off', 'log' (avertissement dans les logs) ou 'raise'
+(exception, pour faire échouer les tests). Comme pour les mesures de
+instrumentation, l'inspecteur actif est porté par une ContextVar et relevé
+par inspect_query sur toutes les connexions, y compris celles des threads
+de l'ORM asynchrone. Dans un test :
+
+    with querycheck.detect() as inspector:
+        self.client.get(url)
+    inspector.assert_clean()
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Fichiers de l'application qui ne sont jamais à l'origine d'une requête
+IGNORED_FILES = {os.path.join(APP_DIR, name) for name in ('querycheck.py', 'instrumentation.py')}
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?|NULL)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+TRANSACTION_RE = re.compile(r'^\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+
+_active = ContextVar('query_inspector', default=None)
+
+
+class QueryIssuesError(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """Forme normalisée d'une requête : mêmes empreintes pour des valeurs différentes"""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def _location():
+    """(ligne de template, ligne de code de l'application) à l'origine de la requête"""
+    template = source = None
+    frame = sys._getframe(2)
+    while frame is not None and not (template and source):
+        code = frame.f_code
+        if template is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template = f'{origin.template_name or origin.name}:{token.lineno}'
+        elif (source is None and code.co_filename.startswith(APP_DIR)
+              and code.co_filename not in IGNORED_FILES):
+            path = os.path.relpath(code.co_filename, os.path.dirname(APP_DIR))
+            source = f'{path}:{frame.f_lineno} ({code.co_name})'
+        frame = frame.f_back
+    return template, source
+
+
+class Issue:
+    def __init__(self, kind, sql, count, duration, template, source):
+        self.kind = kind
+        self.sql = sql
+        self.count = count
+        self.duration = duration
+        self.template = template
+        self.source = source
+        self.view = None
+
+    def __str__(self):
+        where = ', '.join(filter(None, [
+            f'vue {self.view}' if self.view else None,
+            f'template {self.template}' if self.template else None,
+            f'code {self.source}' if self.source else None,
+        ]))
+        if self.kind == 'repeated':
+            head = f'N+1 : {self.count} requêtes identiques'
+        else:
+            head = f'Requête lente : {self.duration * 1000:.1f} ms'
+        return f'{head} ({where}) : {self.sql[:300]}'
+
+
+class QueryInspector:
+    """Enveloppe connection.execute_wrapper et relève les problèmes"""
+
+    def __init__(self, repeat_threshold=None, slow_ms=None):
+        if repeat_threshold is None:
+            repeat_threshold = getattr(settings, 'QUERY_CHECK_REPEAT_THRESHOLD', 5)
+        if slow_ms is None:
+            slow_ms = getattr(settings, 'QUERY_CHECK_SLOW_MS', 100)
+        self.repeat_threshold = repeat_threshold
+        self.slow = slow_ms / 1000
+        self.counts = {}
+        self.issues = []
+        self._repeated = {}
+        # Requêtes relevées en parallèle par les threads du dashboard
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if not TRANSACTION_RE.match(sql):
+                self._record(sql, duration)
+
+    def _record(self, sql, duration):
+        shape = fingerprint(sql)
+        with self._lock:
+            count = self.counts.get(shape, 0) + 1
+            self.counts[shape] = count
+            if count == self.repeat_threshold:
+                # Emplacement relevé une seule fois, au franchissement du seuil
+                issue = Issue('repeated', shape, count, None, *_location())
+                self._repeated[shape] = issue
+                self.issues.append(issue)
+            elif count > self.repeat_threshold:
+                self._repeated[shape].count = count
+            if duration >= self.slow:
+                self.issues.append(Issue('slow', shape, 1, duration, *_location()))
+
+    @contextmanager
+    def activated(self):
+        """Relève les requêtes du contexte courant, dans tous les threads"""
+        from .instrumentation import install_thread_query_hooks
+
+        install_thread_query_hooks()
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def set_view(self, view):
+        for issue in self.issues:
+            issue.view = issue.view or view
+
+    def report(self):
+        return '\n'.join(str(issue) for issue in self.issues)
+
+    def assert_clean(self):
+        if self.issues:
+            raise QueryIssuesError(self.report())
+
+
+@contextmanager
+def detect(repeat_threshold=None, slow_ms=None):
+    """Relève les problèmes des requêtes exécutées dans le bloc"""
+    inspector = QueryInspector(repeat_threshold, slow_ms)
+    with inspector.activated():
+        yield inspector
+
+
+def inspect_query(execute, sql, params, many, context):
+    inspector = _active.get()
+    if inspector is None:
+        return execute(sql, params, many, context)
+    return inspector(execute, sql, params, many, context)
+
+
+class QueryCheckMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = getattr(settings, 'QUERY_CHECK', 'off')
+        if mode == 'off':
+            return self.get_response(request)
+
+        with detect() as inspector:
+            response = self.get_response(request)
+        self._report(request, inspector, mode)
+        return response
+
+    async def __acall__(self, request):
+        mode = getattr(settings, 'QUERY_CHECK', 'off')
+        if mode == 'off':
+            return await self.get_response(request)
+
+        with detect() as inspector:
+            response = await self.get_response(request)
+        self._report(request, inspector, mode)
+        return response
+
+    def _report(self, request, inspector, mode):
+        match = getattr(request, 'resolver_match', None)
+        inspector.set_view(match.view_name if match else request.path)
+        if inspector.issues:
+            if mode == 'raise':
+                inspector.assert_clean()
+            for issue in inspector.issues:
+                logger.warning('%s', issue)
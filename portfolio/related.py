@@ -0,0 +1,88 @@
+"""Index des projets similaires (indice de Jaccard sur les technologies)."""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+
+def jaccard(a, b):
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+def compute_scores(memberships, project_ids=None):
+    """Similarités entre projets partageant au moins une technologie.
+
+    memberships est une liste de couples (projet, technologie) ; si
+    project_ids est donné, seules les paires impliquant ces projets sont
+    calculées. Renvoie des triplets (projet, projet similaire, score) dans
+    les deux sens.
+    """
+    skills_by_project = defaultdict(set)
+    projects_by_skill = defaultdict(set)
+    for project_id, skill_id in memberships:
+        skills_by_project[project_id].add(skill_id)
+        projects_by_skill[skill_id].add(project_id)
+
+    sources = skills_by_project if project_ids is None else project_ids
+    pairs = set()
+    for project_id in sources:
+        for skill_id in skills_by_project.get(project_id, ()):
+            for other_id in projects_by_skill[skill_id]:
+                if other_id != project_id:
+                    pairs.add((min(project_id, other_id), max(project_id, other_id)))
+
+    scores = []
+    for a, b in pairs:
+        score = jaccard(skills_by_project[a], skills_by_project[b])
+        scores.append((a, b, score))
+        scores.append((b, a, score))
+    return scores
+
+
+def _memberships():
+    from .models import Project
+    return Project.technologies.through.objects.values_list('project_id', 'skill_id')
+
+
+@transaction.atomic
+def update_related(project_ids):
+    """Recalcule les similarités des projets dont les technologies ont changé"""
+    from .models import RelatedProject
+
+    project_ids = set(project_ids)
+    RelatedProject.objects.filter(
+        Q(project_id__in=project_ids) | Q(related_id__in=project_ids)
+    ).delete()
+    RelatedProject.objects.bulk_create([
+        RelatedProject(project_id=a, related_id=b, score=score)
+        for a, b, score in compute_scores(_memberships(), project_ids)
+    ])
+
+
+@transaction.atomic
+def rebuild_related():
+    """Reconstruit tout l'index et renvoie le nombre de paires enregistrées"""
+    from .models import RelatedProject
+
+    RelatedProject.objects.all().delete()
+    entries = RelatedProject.objects.bulk_create([
+        RelatedProject(project_id=a, related_id=b, score=score)
+        for a, b, score in compute_scores(_memberships())
+    ], batch_size=1000)
+    return len(entries)
+
+
+def _top_entries(project, limit):
+    from .models import RelatedProject
+
+    return RelatedProject.objects.filter(project=project).select_related('related')[:limit]
+
+
+def top_related(project, limit=3):
+    """Projets les plus similaires, en une requête sur l'index (project, -score)"""
+    return [entry.related for entry in _top_entries(project, limit)]
+
+
+async def atop_related(project, limit=3):
+    return [entry.related async for entry in _top_entries(project, limit)]
@@ -0,0 +1,171 @@
+"""Redimensionnement des images à la demande avec cache disque LRU.
+
+/media/resized/<l>x<h>/<chemin> sert l'image du stockage des médias
+redimensionnée (h=0 conserve les proportions) dans le meilleur format accepté
+par le navigateur, pour les seules tailles de RESIZED_IMAGE_SIZES. Le résultat est écrit de façon atomique dans
+RESIZED_IMAGE_CACHE_DIR, dont la taille est bornée par
+RESIZED_IMAGE_CACHE_MAX_SIZE : les fichiers les moins récemment servis sont
+supprimés en premier. Les requêtes simultanées pour la même déclinaison
+attendent un seul redimensionnement.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+
+from . import images
+
+# Les fichiers restent sous ce seuil après une éviction pour ne pas en
+# déclencher une à chaque écriture
+EVICTION_TARGET = 0.9
+
+
+class ImageResizeError(Exception):
+    pass
+
+
+def negotiate_format(accept):
+    """Format de sortie d'après l'en-tête Accept (JPEG par défaut)"""
+    for fmt in images.output_formats():
+        if fmt == 'jpeg' or images.CONTENT_TYPES[fmt] in accept:
+            return fmt
+    return 'jpeg'
+
+
+class ResizeCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    @property
+    def directory(self):
+        return Path(getattr(settings, 'RESIZED_IMAGE_CACHE_DIR', settings.BASE_DIR / 'cache' / 'resized'))
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'RESIZED_IMAGE_CACHE_MAX_SIZE', 200 * 1024 * 1024)
+
+    def _entries(self):
+        return [p for p in self.directory.glob('*/*') if p.is_file() and not p.name.startswith('.')]
+
+    def _cache_path(self, name, width, height, fmt, storage):
+        try:
+            version = f'{storage.size(name)}-{storage.get_modified_time(name).timestamp()}'
+        except (OSError, NotImplementedError, SuspiciousFileOperation) as exc:
+            raise ImageResizeError(name) from exc
+        key = hashlib.sha1(f'{name}|{width}|{height}|{fmt}|{version}'.encode()).hexdigest()
+        return self.directory / key[:2] / f'{key}.{fmt}'
+
+    def get(self, name, width, height, fmt, storage=default_storage):
+        """Chemin du fichier redimensionné, produit au besoin"""
+        path = self._cache_path(name, width, height, fmt, storage)
+        try:
+            # La date de modification sert d'horodatage LRU
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            future = self._inflight.get(path)
+            owner = future is None
+            if owner:
+                future = self._inflight[path] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            self._write(path, self._render(name, width, height, fmt, storage))
+            future.set_result(path)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[path]
+        return path
+
+    def _render(self, name, width, height, fmt, storage):
+        try:
+            image = images.open_image(storage, name)
+        except Exception as exc:
+            # Fichier absent, chemin refusé par le stockage ou image illisible
+            raise ImageResizeError(name) from exc
+        return images.encode(images.resize(image, width, height or None), fmt)
+
+    def _write(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Écriture dans un fichier temporaire du même dossier puis renommage
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self._entries())
+            else:
+                self._size += len(data)
+            over = self._size > self.max_size
+        if over:
+            self.evict()
+
+    def evict(self):
+        """Supprime les fichiers les moins récemment servis jusqu'au seuil"""
+        entries = []
+        for p in self._entries():
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size * EVICTION_TARGET
+        removed = 0
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._size = total
+            self.evicted += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evicted': self.evicted,
+                'size': self._size,
+            }
+
+
+resize_cache = ResizeCache()
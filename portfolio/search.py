@@ -0,0 +1,157 @@
+"""Recherche plein texte des projets via un index inversé.
+
+L'index est stocké dans ProjectSearchTerm (un terme normalisé et un poids par
+projet), mis à jour à chaque sauvegarde de Project, et chargé en mémoire une
+fois par processus et par version pour répondre sans requête SQL.
+"""
+import html
+import math
+import re
+import unicodedata
+import uuid
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.html import strip_tags
+
+INDEX_VERSION_KEY = 'portfolio:search-index-version'
+
+# Poids des champs dans le score
+FIELD_WEIGHTS = (
+    ('title', 3),
+    ('description', 2),
+    ('detailed_description', 1),
+)
+# Une correspondance sur un préfixe compte moins qu'un mot exact
+PREFIX_FACTOR = 0.5
+MAX_TERM_LENGTH = 100
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('''
+    au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma
+    mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se
+    ses son sur ta te tes toi ton tu un une vos votre vous est sont
+    a an and are as at be by for from in is it of on or the to with
+'''.split())
+
+
+def tokenize(text):
+    """Découpe un texte (HTML accepté) en termes sans accents ni mots vides"""
+    text = html.unescape(strip_tags(text or ''))
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [
+        token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text)
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def project_terms(project):
+    """Poids de chaque terme d'un projet (objet exposant les champs indexés)"""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(getattr(project, field)):
+            weights[token] += weight
+    return weights
+
+
+def invalidate_index():
+    """Force le rechargement de l'index en mémoire dans tous les processus"""
+    cache.set(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def index_project(project):
+    """Réindexe un projet après sa modification"""
+    from .models import ProjectSearchTerm
+
+    with transaction.atomic():
+        ProjectSearchTerm.objects.filter(project=project).delete()
+        ProjectSearchTerm.objects.bulk_create([
+            ProjectSearchTerm(project=project, term=term, weight=weight)
+            for term, weight in project_terms(project).items()
+        ])
+    invalidate_index()
+
+
+def rebuild_index():
+    """Reconstruit tout l'index et renvoie le nombre de termes indexés"""
+    from .models import Project, ProjectSearchTerm
+
+    with transaction.atomic():
+        ProjectSearchTerm.objects.all().delete()
+        entries = [
+            ProjectSearchTerm(project=project, term=term, weight=weight)
+            for project in Project.objects.only(*(field for field, _ in FIELD_WEIGHTS))
+            for term, weight in project_terms(project).items()
+        ]
+        ProjectSearchTerm.objects.bulk_create(entries, batch_size=1000)
+    invalidate_index()
+    return len(entries)
+
+
+class _MemoryIndex:
+    def __init__(self):
+        self.version = None
+        self.postings = {}
+        self.terms = []
+        self.document_count = 0
+
+    def load(self, version):
+        from .models import ProjectSearchTerm
+
+        postings = defaultdict(dict)
+        for project_id, term, weight in ProjectSearchTerm.objects.values_list(
+            'project_id', 'term', 'weight'
+        ).iterator():
+            postings[term][project_id] = weight
+        self.postings = dict(postings)
+        self.terms = sorted(self.postings)
+        self.document_count = len({pid for docs in self.postings.values() for pid in docs})
+        self.version = version
+
+    def matches(self, token):
+        """Scores des projets contenant token (mot exact ou préfixe)"""
+        scores = defaultdict(float)
+        position = bisect_left(self.terms, token)
+        while position < len(self.terms) and self.terms[position].startswith(token):
+            term = self.terms[position]
+            docs = self.postings[term]
+            idf = math.log(1 + self.document_count / len(docs))
+            factor = 1 if term == token else PREFIX_FACTOR
+            for project_id, weight in docs.items():
+                scores[project_id] = max(scores[project_id], weight * idf * factor)
+            position += 1
+        return scores
+
+
+_index = _MemoryIndex()
+
+
+def _current_index():
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(INDEX_VERSION_KEY)
+    if _index.version != version:
+        _index.load(version)
+    return _index
+
+
+def search(query):
+    """Identifiants des projets contenant tous les termes, par pertinence"""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    index = _current_index()
+    scores = None
+    for token in dict.fromkeys(tokens):
+        matches = index.matches(token)
+        if scores is None:
+            scores = matches
+        else:
+            scores = {pid: score + matches[pid] for pid, score in scores.items() if pid in matches}
+        if not scores:
+            return []
+    return sorted(scores, key=lambda pid: (-scores[pid], pid))
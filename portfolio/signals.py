@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import related, search
+from .caching import bump_content_generation, invalidate_site_settings
+from .dashboard import invalidate_dashboard
+from .images import derivative_pool
+from .instrumentation import install_query_hooks
+from .models import Contact, Experience, Project, SiteSettings, Skill
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    # Mesures et détection des requêtes, quel que soit le thread de la connexion
+    install_query_hooks(connection)
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def site_settings_changed(sender, **kwargs):
+    invalidate_site_settings()
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Contact)
+@receiver(post_delete, sender=Project)
+def dashboard_data_changed(sender, **kwargs):
+    invalidate_dashboard()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Experience)
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Experience)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(m2m_changed, sender=Project.technologies.through)
+def public_content_changed(sender, update_fields=None, **kwargs):
+    # Le compteur de vues ne modifie pas le contenu affiché au public
+    if update_fields and set(update_fields) <= {'views'}:
+        return
+    bump_content_generation()
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'views'}:
+        return
+    search.index_project(instance)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, **kwargs):
+    # Les termes sont supprimés en cascade
+    search.invalidate_index()
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+def project_technologies_changed(sender, action, reverse, instance, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        related.update_related([instance.pk])
+    elif pk_set:
+        # Modification depuis une compétence : pk_set contient les projets
+        related.update_related(pk_set)
+    else:
+        related.rebuild_related()
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted(sender, **kwargs):
+    # La suppression en cascade des liaisons n'envoie pas m2m_changed
+    related.rebuild_related()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=SiteSettings)
+def image_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'views'}:
+        return
+    field_file = instance.image if sender is Project else instance.profile_image
+    if field_file:
+        # Déclinaisons générées en arrière-plan, une fois le fichier enregistré
+        name = field_file.name
+        transaction.on_commit(lambda: derivative_pool.schedule(name))
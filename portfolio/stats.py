@@ -0,0 +1,229 @@
+"""Agrégats de visites (par page et par jour/heure) utilisés par le dashboard."""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .hll import HyperLogLog
+from .models import DailyUniqueSketch, PageVisitDaily, PageVisitHourly, SiteVisit
+
+
+def _hour_of(timestamp):
+    return timezone.localtime(timestamp).replace(minute=0, second=0, microsecond=0)
+
+
+def _increment(model, lookup, amount):
+    """Ajoute amount au compteur identifié par lookup (créé au besoin)"""
+    if model.objects.filter(**lookup).update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=amount, **lookup)
+    except IntegrityError:
+        # Créé entre-temps par un autre worker
+        model.objects.filter(**lookup).update(count=F('count') + amount)
+
+
+def _merge_sketch(day, kind, sketch):
+    """Fusionne une esquisse HyperLogLog dans celle du jour (ligne verrouillée)"""
+    with transaction.atomic():
+        row = DailyUniqueSketch.objects.select_for_update().filter(date=day, kind=kind).first()
+        if row is None:
+            try:
+                with transaction.atomic():
+                    DailyUniqueSketch.objects.create(date=day, kind=kind, registers=sketch.to_bytes())
+                return
+            except IntegrityError:
+                row = DailyUniqueSketch.objects.select_for_update().get(date=day, kind=kind)
+        sketch.merge(HyperLogLog.from_bytes(bytes(row.registers)))
+        row.registers = sketch.to_bytes()
+        row.save(update_fields=['registers'])
+
+
+def _day_sketches(visits):
+    """Esquisses des visiteurs (IP) et des sessions par jour pour des visites"""
+    sketches = {}
+    for timestamp, ip_address, session_key in visits:
+        day = timezone.localdate(timestamp)
+        if day not in sketches:
+            sketches[day] = {'visitor': HyperLogLog(), 'session': HyperLogLog()}
+        sketches[day]['visitor'].add(ip_address)
+        if session_key:
+            sketches[day]['session'].add(session_key)
+    return sketches
+
+
+def record_visits(visits):
+    """Met à jour les agrégats pour un lot de visites venant d'être écrit"""
+    daily = Counter()
+    hourly = Counter()
+    for visit in visits:
+        daily[(timezone.localdate(visit.timestamp), visit.page)] += 1
+        hourly[(_hour_of(visit.timestamp), visit.page)] += 1
+
+    for (date, page), amount in daily.items():
+        _increment(PageVisitDaily, {'date': date, 'page': page}, amount)
+    for (hour, page), amount in hourly.items():
+        _increment(PageVisitHourly, {'hour': hour, 'page': page}, amount)
+
+    sketches = _day_sketches((v.timestamp, v.ip_address, v.session_key) for v in visits)
+    for day, kinds in sketches.items():
+        for kind, sketch in kinds.items():
+            _merge_sketch(day, kind, sketch)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+@transaction.atomic
+def rebuild_rollups(since=None, until=None):
+    """Recalcule les agrégats depuis la table brute, entre since et until inclus.
+
+    Sans since, le calcul part du jour de la plus ancienne visite brute : les
+    agrégats des jours déjà purgés (prune_site_visits) sont conservés.
+    """
+    if since is None:
+        oldest = SiteVisit.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest is None:
+            return PageVisitDaily.objects.count(), PageVisitHourly.objects.count()
+        since = timezone.localdate(oldest)
+    start = _day_start(since)
+    visits = SiteVisit.objects.order_by().filter(timestamp__gte=start)
+    daily = PageVisitDaily.objects.filter(date__gte=since)
+    hourly = PageVisitHourly.objects.filter(hour__gte=start)
+    if until:
+        end = _day_start(until + timedelta(days=1))
+        visits = visits.filter(timestamp__lt=end)
+        daily = daily.filter(date__lte=until)
+        hourly = hourly.filter(hour__lt=end)
+    sketches = DailyUniqueSketch.objects.filter(date__gte=since)
+    if until:
+        sketches = sketches.filter(date__lte=until)
+    daily.delete()
+    hourly.delete()
+    sketches.delete()
+
+    daily_rows = visits.annotate(day=TruncDate('timestamp')).values('day', 'page__path').annotate(
+        total=Count('id')
+    )
+    PageVisitDaily.objects.bulk_create(
+        (PageVisitDaily(date=row['day'], page=row['page__path'], count=row['total']) for row in daily_rows),
+        batch_size=1000,
+    )
+    hourly_rows = visits.annotate(slot=TruncHour('timestamp')).values('slot', 'page__path').annotate(
+        total=Count('id')
+    )
+    PageVisitHourly.objects.bulk_create(
+        (PageVisitHourly(hour=row['slot'], page=row['page__path'], count=row['total']) for row in hourly_rows),
+        batch_size=1000,
+    )
+    rows = visits.values_list('timestamp', 'ip_address', 'session_key').iterator(chunk_size=5000)
+    DailyUniqueSketch.objects.bulk_create(
+        DailyUniqueSketch(date=day, kind=kind, registers=sketch.to_bytes())
+        for day, kinds in _day_sketches(rows).items()
+        for kind, sketch in kinds.items()
+    )
+    return PageVisitDaily.objects.count(), PageVisitHourly.objects.count()
+
+
+def ensure_rollups(before):
+    """Complète les agrégats des jours antérieurs à before avant leur purge.
+
+    Un jour est recalculé lorsque ses agrégats comptent moins de visites que
+    la table brute (jour antérieur aux agrégats, écriture hors tampon...).
+    Renvoie la liste des jours recalculés.
+    """
+    raw = SiteVisit.objects.filter(timestamp__lt=before).annotate(
+        day=TruncDate('timestamp')
+    ).values('day').annotate(total=Count('id')).order_by()
+    raw = {row['day']: row['total'] for row in raw}
+    rolled = PageVisitDaily.objects.filter(date__in=list(raw)).values('date').annotate(
+        total=Sum('count')
+    ).order_by()
+    rolled = {row['date']: row['total'] for row in rolled}
+
+    stale = sorted(day for day, total in raw.items() if rolled.get(day, 0) < total)
+    for day in stale:
+        rebuild_rollups(day, day)
+    return stale
+
+
+def visit_totals(today=None):
+    """Visites du jour, des 7 et des 30 derniers jours en une seule requête"""
+    today = today or timezone.localdate()
+    totals = PageVisitDaily.objects.filter(date__gte=today - timedelta(days=30)).aggregate(
+        today=Sum('count', filter=Q(date=today)),
+        week=Sum('count', filter=Q(date__gte=today - timedelta(days=7))),
+        month=Sum('count', filter=Q(date__gte=today - timedelta(days=30))),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+CHART_WINDOWS = (7, 30, 90, 365)
+CHART_GRANULARITIES = ('day', 'hour')
+
+
+def visit_series(days=7, granularity='day', now=None):
+    """Série temporelle des visites sur les days derniers jours.
+
+    Une seule requête groupée sur l'agrégat correspondant à la granularité ;
+    les intervalles sans visite sont complétés à zéro. Renvoie une liste de
+    couples (début de l'intervalle, nombre de visites) par ordre chronologique.
+    """
+    now = timezone.localtime(now)
+    if granularity == 'hour':
+        end = now.replace(minute=0, second=0, microsecond=0)
+        step = timedelta(hours=1)
+        start = end - step * (days * 24 - 1)
+        rows = PageVisitHourly.objects.filter(hour__gte=start, hour__lte=end).values(
+            'hour'
+        ).annotate(total=Sum('count')).order_by()
+        totals = {timezone.localtime(row['hour']): row['total'] for row in rows}
+    else:
+        end = now.date()
+        step = timedelta(days=1)
+        start = end - step * (days - 1)
+        rows = PageVisitDaily.objects.filter(date__range=(start, end)).values(
+            'date'
+        ).annotate(total=Sum('count')).order_by()
+        totals = {row['date']: row['total'] for row in rows}
+
+    series = []
+    bucket = start
+    while bucket <= end:
+        series.append((bucket, totals.get(bucket, 0)))
+        bucket += step
+    return series
+
+
+def unique_totals(today=None):
+    """Visiteurs (IP) et sessions uniques estimés pour le jour, 7 et 30 jours.
+
+    Les esquisses journalières des 30 derniers jours sont lues en une requête
+    puis fusionnées pour chaque période.
+    """
+    today = today or timezone.localdate()
+    periods = {'today': today, 'week': today - timedelta(days=7), 'month': today - timedelta(days=30)}
+    merged = {
+        kind: {period: HyperLogLog() for period in periods}
+        for kind, _ in DailyUniqueSketch.KIND_CHOICES
+    }
+    for row in DailyUniqueSketch.objects.filter(date__gte=periods['month'], date__lte=today):
+        sketch = HyperLogLog.from_bytes(bytes(row.registers))
+        for period, start in periods.items():
+            if row.date >= start:
+                merged[row.kind][period].merge(sketch)
+    return {
+        kind: {period: sketch.count() for period, sketch in sketches.items()}
+        for kind, sketches in merged.items()
+    }
+
+
+def popular_pages(limit=5):
+    return PageVisitDaily.objects.values('page').annotate(
+        count=Sum('count')
+    ).order_by('-count')[:limit]
@@ -0,0 +1,43 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from .. import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, sizes='100vw', **attrs):
+    """<picture> avec un srcset par format, ou <img> simple tant que les
+    déclinaisons n'ont pas été générées.
+
+    Les autres arguments deviennent des attributs de <img> (alt, class...).
+    """
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    manifest = images.get_manifest(field_file.name, field_file.storage)
+    if not manifest:
+        return format_html('<img src="{}"{}>', field_file.url, flatatt(attrs))
+
+    storage = field_file.storage
+    formats = manifest['formats']
+    fallback = 'jpeg' if 'jpeg' in formats else next(iter(formats))
+    attrs.setdefault('width', manifest['width'])
+    attrs.setdefault('height', manifest['height'])
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((images.CONTENT_TYPES[fmt], images.srcset(manifest, fmt, storage), sizes)
+         for fmt in formats if fmt != fallback),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        sources, storage.url(formats[fallback][-1][1]),
+        images.srcset(manifest, fallback, storage), sizes, flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def image_url(field_file, width=1280):
+    """URL de la déclinaison la plus proche de width (fonds CSS...)"""
+    return images.thumbnail_url(field_file, width)
@@ -1,3 +1,1499 @@
-from django.test import TestCase
+import re
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+import gzip
+import io
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import (
+    async_views, benchmark, caching, counters, dashboard, fileserving, images, instrumentation, interning,
+    live, media, querycheck, related, resizing, search, stats, views,
+)
+from .hll import HyperLogLog
+from .mailer import send_queued_mail
+from .counters import view_counter
+from .models import (
+    Contact, DailyUniqueSketch, Experience, OutgoingEmail, PagePath, PageVisitDaily, PageVisitHourly, Project,
+    RelatedProject, SiteSettings, SiteVisit, Skill,
+)
+from .tracking import Visit, VisitBuffer, VisitFilter, visit_buffer, visit_filter, write_visits
+
+# Pas de vidage en arrière-plan : chaque test écrit les tampons explicitement
+_no_flush_thread = override_settings(BUFFER_FLUSH_THREAD=False)
+
+
+def setUpModule():
+    _no_flush_thread.enable()
+
+
+def tearDownModule():
+    _no_flush_thread.disable()
+    # Rien à écrire à l'arrêt, une fois la base de test supprimée
+    view_counter.reset()
+    visit_buffer.reset()
+
+
+@override_settings(VISIT_BUFFER_BATCH_SIZE=3, VISIT_BUFFER_FLUSH_INTERVAL=3600, VISIT_BUFFER_MAX_SIZE=5)
+class VisitBufferTests(TestCase):
+    def setUp(self):
+        self.buffer = VisitBuffer()
+        self.addCleanup(self.buffer.background.stop)
+        self.addCleanup(interning.clear_caches)
+
+    def visit(self, page='/'):
+        return Visit('10.0.0.1', 'Mozilla/5.0', page, '', timezone.now())
+
+    def test_batch_size_triggers_flush(self):
+        self.assertFalse(self.buffer.add(self.visit()))
+        self.assertFalse(self.buffer.add(self.visit()))
+        self.assertEqual(SiteVisit.objects.count(), 0)
+        self.assertTrue(self.buffer.add(self.visit()))
+        self.assertEqual(SiteVisit.objects.count(), 3)
+        self.assertEqual(self.buffer.stats(), {'pending': 0, 'flushed': 3, 'dropped': 0, 'batches': 1})
+
+    def test_interval_triggers_flush(self):
+        self.buffer.add(self.visit())
+        self.buffer._last_flush -= 3600
+        # Écriture laissée à l'appelant (vues asynchrones)
+        self.assertTrue(self.buffer.add(self.visit(), flush=False))
+        self.assertEqual(SiteVisit.objects.count(), 0)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(PageVisitDaily.objects.get().count, 2)
+
+    def test_overflow_drops_new_visits(self):
+        with override_settings(VISIT_BUFFER_BATCH_SIZE=100):
+            for i in range(7):
+                self.buffer.add(self.visit(f'/page-{i}/'))
+        self.assertEqual(self.buffer.stats()['pending'], 5)
+        self.assertEqual(self.buffer.stats()['dropped'], 2)
+        self.buffer.flush()
+        self.assertEqual(sorted(PagePath.objects.values_list('path', flat=True)), [f'/page-{i}/' for i in range(5)])
+
+    def test_failed_write_is_requeued(self):
+        self.buffer.add(self.visit())
+        with mock.patch('portfolio.tracking.write_visits', side_effect=OperationalError('verrou')):
+            with self.assertLogs('portfolio.tracking', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.stats()['pending'], 1)
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_reset(self):
+        self.buffer.add(self.visit())
+        self.buffer.reset()
+        self.assertEqual(self.buffer.stats(), {'pending': 0, 'flushed': 0, 'dropped': 0, 'batches': 0})
+
+
+@override_settings(BUFFER_FLUSH_THREAD=True, VISIT_BUFFER_BATCH_SIZE=2)
+class VisitBufferBackgroundTests(TransactionTestCase):
+    def setUp(self):
+        self.buffer = VisitBuffer()
+        self.addCleanup(self.buffer.background.stop)
+        self.addCleanup(interning.clear_caches)
+
+    def wait_for_visits(self, count):
+        # Attente en mémoire : SQLite verrouille la table pendant l'écriture du thread
+        deadline = time.monotonic() + 5
+        while self.buffer.stats()['flushed'] < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return SiteVisit.objects.count()
+
+    @override_settings(VISIT_BUFFER_FLUSH_INTERVAL=0.05)
+    def test_quiet_site_is_flushed_periodically(self):
+        self.buffer._last_flush += 3600
+        self.assertFalse(self.buffer.add(Visit('10.0.0.1', 'Mozilla/5.0', '/', '', timezone.now())))
+        self.assertEqual(self.wait_for_visits(1), 1)
+
+    @override_settings(VISIT_BUFFER_FLUSH_INTERVAL=3600)
+    def test_full_batch_is_written_outside_the_request(self):
+        self.buffer.add(Visit('10.0.0.1', 'Mozilla/5.0', '/', '', timezone.now()))
+        with mock.patch.object(self.buffer, 'flush', wraps=self.buffer.flush) as flush:
+            # Lot complet : le thread d'arrière-plan est réveillé, la requête n'écrit rien
+            self.assertFalse(self.buffer.add(Visit('10.0.0.2', 'Mozilla/5.0', '/', '', timezone.now())))
+            flush.assert_not_called()
+        self.assertEqual(self.wait_for_visits(2), 2)
+
+
+class VisitRollupTests(TestCase):
+    def setUp(self):
+        self.addCleanup(interning.clear_caches)
+        self.now = timezone.localtime().replace(minute=30, second=0, microsecond=0)
+        self.today = timezone.localdate(self.now)
+
+    def visits(self):
+        return [
+            Visit('10.0.0.1', 'Mozilla/5.0', '/', 'a', self.now),
+            Visit('10.0.0.2', 'Mozilla/5.0', '/', 'b', self.now - timedelta(minutes=10)),
+            Visit('10.0.0.1', 'Mozilla/5.0', '/projets/', 'a', self.now - timedelta(hours=2)),
+            Visit('10.0.0.3', 'Mozilla/5.0', '/', 'c', self.now - timedelta(days=3)),
+        ]
+
+    def rollups(self):
+        daily = sorted(PageVisitDaily.objects.values_list('date', 'page', 'count'))
+        hourly = sorted(PageVisitHourly.objects.values_list('hour', 'page', 'count'))
+        sketches = sorted(
+            (row.date, row.kind, bytes(row.registers)) for row in DailyUniqueSketch.objects.all()
+        )
+        return daily, hourly, sketches
+
+    def test_record_visits_accumulates_batches(self):
+        write_visits(self.visits())
+        write_visits(self.visits()[:1])
+        hour = self.now.replace(minute=0)
+        self.assertEqual(PageVisitDaily.objects.get(date=self.today, page='/').count, 3)
+        self.assertEqual(PageVisitHourly.objects.get(hour=hour, page='/').count, 3)
+        self.assertEqual(PageVisitHourly.objects.get(hour=hour - timedelta(hours=2), page='/projets/').count, 1)
+        self.assertEqual(stats.unique_totals(self.today)['visitor']['week'], 3)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        write_visits(self.visits())
+        expected = self.rollups()
+        PageVisitDaily.objects.all().delete()
+        PageVisitHourly.objects.update(count=99)
+        DailyUniqueSketch.objects.all().delete()
+        self.assertEqual(stats.rebuild_rollups(), (len(expected[0]), len(expected[1])))
+        self.assertEqual(self.rollups(), expected)
+
+    def test_rebuild_is_limited_to_the_given_days(self):
+        write_visits(self.visits())
+        old_day = self.today - timedelta(days=3)
+        PageVisitDaily.objects.update(count=99)
+        stats.rebuild_rollups(self.today, self.today)
+        self.assertEqual(PageVisitDaily.objects.get(date=self.today, page='/').count, 2)
+        self.assertEqual(PageVisitDaily.objects.get(date=old_day).count, 99)
+
+    def test_backfill_command(self):
+        write_visits(self.visits())
+        expected = self.rollups()
+        PageVisitDaily.objects.update(count=99)
+        out = io.StringIO()
+        call_command('backfill_visit_rollups', stdout=out)
+        self.assertIn(f'{len(expected[0])} lignes journalières', out.getvalue())
+        self.assertEqual(self.rollups(), expected)
+
+        PageVisitDaily.objects.update(count=99)
+        call_command('backfill_visit_rollups', f'--since={self.today}', stdout=io.StringIO())
+        self.assertEqual(PageVisitDaily.objects.get(date=self.today - timedelta(days=3)).count, 99)
+        self.assertEqual(PageVisitDaily.objects.get(date=self.today, page='/').count, 2)
+        with self.assertRaises(CommandError):
+            call_command('backfill_visit_rollups', '--since=hier')
+
+    @override_settings(TIME_ZONE='Pacific/Auckland')
+    def test_totals_use_local_date(self):
+        # 11 h 30 UTC : déjà le lendemain à Auckland (UTC+13)
+        now = datetime(2026, 3, 10, 11, 30, tzinfo=dt_timezone.utc)
+        write_visits([Visit('10.0.0.1', 'Mozilla/5.0', '/', 'a', now)])
+        self.assertEqual(PageVisitDaily.objects.get().date, date(2026, 3, 11))
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(stats.visit_totals()['today'], 1)
+            self.assertEqual(stats.unique_totals()['visitor']['today'], 1)
+
+
+class VisitSeriesTests(TestCase):
+    def setUp(self):
+        self.addCleanup(interning.clear_caches)
+        self.now = timezone.make_aware(datetime(2026, 3, 10, 15, 30))
+        write_visits([
+            Visit('10.0.0.1', 'Mozilla/5.0', '/', '', self.now - offset)
+            for offset in (
+                timedelta(0), timedelta(hours=3), timedelta(days=1),
+                timedelta(days=6), timedelta(days=7),
+            )
+        ])
+
+    def test_day_series_is_zero_filled(self):
+        series = stats.visit_series(7, 'day', self.now)
+        self.assertEqual([bucket for bucket, _ in series], [date(2026, 3, d) for d in range(4, 11)])
+        self.assertEqual([count for _, count in series], [1, 0, 0, 0, 0, 1, 2])
+
+    def test_hour_series_is_zero_filled(self):
+        series = stats.visit_series(1, 'hour', self.now)
+        self.assertEqual(len(series), 24)
+        self.assertEqual(series[0][0], self.now.replace(day=9, hour=16, minute=0))
+        self.assertEqual(series[-1][0], self.now.replace(minute=0))
+        counts = [count for _, count in series]
+        self.assertEqual((counts[20], counts[23], sum(counts)), (1, 1, 2))
+
+    def test_series_length_per_window(self):
+        for days in stats.CHART_WINDOWS:
+            with self.subTest(days=days):
+                self.assertEqual(len(stats.visit_series(days, 'day', self.now)), days)
+                self.assertEqual(len(stats.visit_series(days, 'hour', self.now)), days * 24)
+
+    def test_chart_api(self):
+        url = reverse('api_chart_data')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('staff', password='pass', is_staff=True))
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            payload = self.client.get(url).json()
+            self.assertEqual(payload['labels'][-1], '10/03')
+            self.assertEqual(payload['data'], [1, 0, 0, 0, 0, 1, 2])
+            payload = self.client.get(url, {'days': 7, 'granularity': 'hour'}).json()
+            self.assertEqual((len(payload['data']), payload['labels'][-1]), (168, '10/03 15h'))
+        for params in ({'days': 3}, {'days': 'abc'}, {'granularity': 'minute'}, {'days': 30, 'granularity': ''}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class SiteSettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.site = SiteSettings.objects.create(
+            name='Jean Dupont', tagline='Développeur', bio='<p>Bio</p>',
+            email='jean@example.com', location='Paris',
+        )
+        self.addCleanup(caching.invalidate_site_settings)
+
+    def test_loaded_once(self):
+        self.assertEqual(caching.get_site_settings().name, 'Jean Dupont')
+        with self.assertNumQueries(0):
+            caching.get_site_settings()
+
+    def test_save_invalidates(self):
+        caching.get_site_settings()
+        self.site.name = 'Jeanne Dupont'
+        self.site.save()
+        self.assertEqual(caching.get_site_settings().name, 'Jeanne Dupont')
+        self.site.delete()
+        self.assertIsNone(caching.get_site_settings())
+
+    def test_local_copy_expires(self):
+        caching.get_site_settings()
+        # Modification faite par un autre processus (époque locale inchangée)
+        SiteSettings.objects.update(name='Jeanne Dupont')
+        with override_settings(SITE_SETTINGS_CACHE_TIMEOUT=None):
+            self.assertEqual(caching.get_site_settings().name, 'Jean Dupont')
+        with override_settings(SITE_SETTINGS_CACHE_TIMEOUT=0):
+            self.assertEqual(caching.get_site_settings().name, 'Jeanne Dupont')
+
+
+@override_settings(ADMIN_EMAIL='admin@example.com', DEFAULT_FROM_EMAIL='site@example.com')
+class OutgoingEmailTests(TestCase):
+    def create_contact(self):
+        return Contact.objects.create(
+            name='Alice', email='alice@example.com', subject='Projet', message='Bonjour',
+        )
+
+    def test_contact_queues_notifications_without_sending(self):
+        self.create_contact()
+        self.assertEqual(OutgoingEmail.objects.filter(status='pending').count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_contact_post_does_not_send_mail(self):
+        response = self.client.post(reverse('contact'), {
+            'name': 'Bob', 'email': 'bob@example.com', 'subject': 'Devis',
+            'message': 'Bonjour', 'priority': 'medium',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+    def test_send_queued_mail_sends_batch(self):
+        self.create_contact()
+        self.assertEqual(send_queued_mail(), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+        self.assertEqual(mail.outbox[1].to, ['alice@example.com'])
+        self.assertFalse(OutgoingEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                       EMAIL_HOST='127.0.0.1', EMAIL_PORT=1, EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_send_is_retried_with_backoff(self):
+        self.create_contact()
+        self.assertEqual(send_queued_mail(), (0, 2))
+        email = OutgoingEmail.objects.first()
+        self.assertEqual(email.status, 'pending')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, email.created_at)
+        # Pas encore dû : la tentative suivante est différée
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=email.created_at)
+        send_queued_mail()
+        self.assertFalse(OutgoingEmail.objects.exclude(status='failed').exists())
+
+
+class FileServingTests(SimpleTestCase):
+    CONTENT = bytes(range(256)) * 4
+    ETAG = '"v1"'
+    MODIFIED = 1700000000
+
+    def serve(self, open_file=None, filename='fichier.bin', as_attachment=False, **headers):
+        request = RequestFactory().get('/fichier.bin', **headers)
+        return fileserving.serve_file(
+            request, open_file or (lambda: io.BytesIO(self.CONTENT)), len(self.CONTENT),
+            'application/octet-stream', self.ETAG, self.MODIFIED, filename=filename,
+            as_attachment=as_attachment,
+        )
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_response(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response['Content-Length'], response['Accept-Ranges']), ('1024', 'bytes'))
+        self.assertEqual((response['ETag'], response['Last-Modified']), (self.ETAG, http_date(self.MODIFIED)))
+        self.assertEqual(self.body(response), self.CONTENT)
+
+    def test_single_range(self):
+        for header, start, end in (
+            ('bytes=0-9', 0, 9),
+            ('bytes=1000-', 1000, 1023),
+            ('bytes=-24', 1000, 1023),
+            ('bytes=1000-5000', 1000, 1023),
+            ('bytes=-5000', 0, 1023),
+        ):
+            with self.subTest(header=header):
+                response = self.serve(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/1024')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(self.body(response), self.CONTENT[start:end + 1])
+
+    def test_range_keeps_non_ascii_filename(self):
+        for as_attachment in (True, False):
+            with self.subTest(as_attachment=as_attachment):
+                full = self.serve(filename='CV_Éloïse "v2".pdf', as_attachment=as_attachment)
+                partial = self.serve(
+                    filename='CV_Éloïse "v2".pdf', as_attachment=as_attachment, HTTP_RANGE='bytes=0-9',
+                )
+                self.assertEqual(partial.status_code, 206)
+                self.assertEqual(partial['Content-Disposition'], full['Content-Disposition'])
+                self.assertIn("filename*=utf-8''CV_%C3%89lo%C3%AFse", partial['Content-Disposition'])
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=1024-', 'bytes=5000-6000', 'bytes=-0'):
+            with self.subTest(header=header):
+                response = self.serve(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */1024')
+        with self.assertRaises(fileserving.RangeNotSatisfiable):
+            fileserving.parse_range('bytes=-1', 0)
+
+    def test_unsupported_range_serves_whole_file(self):
+        for header in ('bytes=0-1,5-6', 'items=0-1', 'bytes=9-3', 'bytes=-'):
+            with self.subTest(header=header):
+                response = self.serve(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.body(response), self.CONTENT)
+
+    def test_not_modified(self):
+        def unexpected_open():
+            raise AssertionError("Fichier ouvert pour une réponse 304")
+
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': self.ETAG},
+            {'HTTP_IF_NONE_MATCH': f'"v0", {self.ETAG}'},
+            {'HTTP_IF_MODIFIED_SINCE': http_date(self.MODIFIED)},
+            {'HTTP_IF_MODIFIED_SINCE': http_date(self.MODIFIED + 60)},
+        ):
+            with self.subTest(headers=headers):
+                response = self.serve(unexpected_open, **headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], self.ETAG)
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': '"v0"'},
+            {'HTTP_IF_MODIFIED_SINCE': http_date(self.MODIFIED - 60)},
+            # If-None-Match prime sur If-Modified-Since
+            {'HTTP_IF_NONE_MATCH': '"v0"', 'HTTP_IF_MODIFIED_SINCE': http_date(self.MODIFIED)},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.serve(**headers).status_code, 200)
+
+    def test_if_range(self):
+        for if_range, status in (
+            (self.ETAG, 206),
+            ('"v0"', 200),
+            ('W/"v1"', 200),
+            (http_date(self.MODIFIED), 206),
+            (http_date(self.MODIFIED - 60), 200),
+        ):
+            with self.subTest(if_range=if_range):
+                response = self.serve(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=if_range)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(self.body(response), self.CONTENT[:10] if status == 206 else self.CONTENT)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skill = Skill.objects.create(name='Elixir', category='backend')
+        cls.experience = Experience.objects.create(
+            company='Agence', position='Développeur', description='<p>Missions</p>',
+            start_date=timezone.now().date(),
+        )
+        cls.project = Project.objects.create(
+            title='Boutique', slug='boutique', description='Boutique en ligne',
+            detailed_description='<p>Détails</p>', image='projects/p.png',
+            status='completed', featured=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(interning.clear_caches)
+
+    def assertPageChanges(self, url, old, new, change):
+        self.assertContains(self.client.get(url), old)
+        change()
+        self.assertContains(self.client.get(url), new)
+
+    def test_page_is_served_from_cache(self):
+        self.assertContains(self.client.get(reverse('home')), 'Boutique')
+        # Modification sans signal : la page en cache est servie telle quelle
+        Project.objects.filter(pk=self.project.pk).update(title='Atelier')
+        self.assertContains(self.client.get(reverse('home')), 'Boutique')
+
+    def test_save_invalidates_pages(self):
+        def save(obj, field, value):
+            def change():
+                setattr(obj, field, value)
+                obj.save()
+            return change
+
+        self.assertPageChanges(reverse('home'), 'Boutique', 'Atelier', save(self.project, 'title', 'Atelier'))
+        self.assertPageChanges(reverse('home'), 'Elixir', 'Erlang', save(self.skill, 'name', 'Erlang'))
+        self.assertPageChanges(reverse('about'), 'Agence', 'Studio', save(self.experience, 'company', 'Studio'))
+
+    def test_delete_invalidates_pages(self):
+        for url, obj, text in (
+            (reverse('home'), self.project, 'Boutique'),
+            (reverse('home'), self.skill, 'Elixir'),
+            (reverse('about'), self.experience, 'Agence'),
+        ):
+            self.assertContains(self.client.get(url), text)
+            obj.delete()
+            self.assertNotContains(self.client.get(url), text)
+
+    def test_view_count_keeps_pages(self):
+        generation = caching.content_generation()
+        self.project.views += 1
+        self.project.save(update_fields=['views'])
+        self.assertEqual(caching.content_generation(), generation)
+
+    def test_unread_query_parameters_share_the_page(self):
+        url = reverse('projects')
+        self.client.get(url, {'status': 'completed', 'x': '1'})
+        Project.objects.filter(pk=self.project.pk).update(title='Atelier', description='Atelier en ligne')
+        # Paramètres ignorés par la vue : même entrée de cache
+        self.assertContains(self.client.get(url, {'x': '2', 'status': 'completed'}), 'Boutique')
+        self.assertContains(self.client.get(url, {'status': 'completed', 'page': '1'}), 'Atelier')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=30)
+    def test_pages_expire(self):
+        # Sans cache partagé, seule l'expiration atteint les autres processus
+        with mock.patch.object(caching.cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get(reverse('about'))
+        self.assertEqual(cache_set.call_args.args[2], 30)
+
+
+class ViewCounterTests(TransactionTestCase):
+    def setUp(self):
+        # bulk_create : pas de génération d'images en arrière-plan
+        Project.objects.bulk_create([
+            Project(title=slug, slug=slug, description='-', detailed_description='-', image='projects/p.png')
+            for slug in ('alpha', 'beta')
+        ])
+        self.counter = counters.ViewCounter()
+        self.addCleanup(self.counter.background.stop)
+
+    def views(self):
+        return dict(Project.objects.values_list('slug', 'views'))
+
+    @override_settings(PROJECT_VIEWS_FLUSH_INTERVAL=3600)
+    def test_exact_totals_under_concurrency(self):
+        done = threading.Event()
+
+        def hits(slug):
+            for _ in range(500):
+                self.counter.incr(slug)
+
+        def writer():
+            # Écritures concurrentes des incréments pendant les vues
+            try:
+                while not done.is_set():
+                    self.counter.flush()
+            finally:
+                connection.close()
+
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        threads = [threading.Thread(target=hits, args=(slug,)) for slug in ('alpha', 'beta') * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        writer_thread.join()
+        self.counter.flush()
+        self.assertEqual(self.views(), {'alpha': 2000, 'beta': 2000})
+
+    @override_settings(BUFFER_FLUSH_THREAD=True, PROJECT_VIEWS_FLUSH_INTERVAL=0.05)
+    def test_background_flush_without_new_views(self):
+        self.counter._last_flush = time.monotonic() + 3600
+        self.counter.incr('alpha', 3)
+        self.assertTrue(self.counter.background.running)
+        # Attente en mémoire : SQLite verrouille la table pendant l'écriture du thread
+        deadline = time.monotonic() + 5
+        while self.counter.pending('alpha') and time.monotonic() < deadline:
+            time.sleep(0.02)
+        # L'arrêt attend la fin de l'écriture en cours
+        self.counter.background.stop()
+        self.assertEqual(self.views()['alpha'], 3)
+
+    @override_settings(BUFFER_FLUSH_THREAD=True, PROJECT_VIEWS_FLUSH_INTERVAL=3600)
+    def test_due_flush_is_left_to_the_thread(self):
+        self.counter.incr('alpha')
+        self.assertTrue(self.counter.background.running)
+        self.counter._last_flush -= 3600
+        with mock.patch.object(self.counter, 'flush') as inline_flush:
+            self.assertFalse(self.counter.incr('alpha'))
+        inline_flush.assert_not_called()
+        deadline = time.monotonic() + 5
+        while self.counter.pending('alpha') and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.counter.background.stop()
+        self.assertEqual(self.views()['alpha'], 2)
+
+    def test_no_background_flush_when_disabled(self):
+        self.counter.incr('alpha')
+        self.assertFalse(self.counter.background.running)
+        # Sans thread, l'écriture due a lieu dans la requête
+        self.counter._last_flush -= 3600
+        self.assertTrue(self.counter.incr('alpha'))
+        self.assertEqual(self.views()['alpha'], 2)
+
+
+class ProjectSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def create(slug, title, description, detailed=''):
+            return Project.objects.create(
+                title=title, slug=slug, description=description, detailed_description=detailed,
+                image='projects/p.png', status='completed',
+            )
+
+        cls.cafe = create('cafe', 'Café Crème', 'Site vitrine', '<p>Réservation de tables</p>')
+        cls.boutique = create('boutique', 'Boutique', 'Boutique en ligne pour un café')
+        cls.mobile = create('mobile', 'Application mobile', 'Réservations de salles')
+        javascript = Skill.objects.create(name='JavaScript', category='frontend')
+        typescript = Skill.objects.create(name='TypeScript', category='frontend')
+        cls.mobile.technologies.add(javascript, typescript)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tokenize_folds_accents_and_stopwords(self):
+        self.assertEqual(search.tokenize('<p>Le Café &amp; la CRÈME</p>'), ['cafe', 'creme'])
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(search.search('CAFÉ crème'), [self.cafe.pk])
+        self.assertEqual(search.search('creme'), search.search('crème'))
+
+    def test_ranking(self):
+        # Titre avant description ; mot exact avant préfixe
+        self.assertEqual(search.search('cafe'), [self.cafe.pk, self.boutique.pk])
+        self.assertEqual(search.search('reservation'), [self.cafe.pk, self.mobile.pk])
+        self.assertEqual(search.search('cafe boutique'), [self.boutique.pk])
+        self.assertEqual(search.search('le la'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.boutique.title = 'Épicerie fine'
+        self.boutique.save()
+        self.assertEqual(search.search('epicerie'), [self.boutique.pk])
+        self.assertEqual(search.search('boutique'), [self.boutique.pk])
+        self.boutique.description = 'Commerce en ligne'
+        self.boutique.save()
+        self.assertEqual(search.search('boutique'), [])
+        self.boutique.delete()
+        self.assertEqual(search.search('epicerie'), [])
+
+    def test_tech_filter_returns_each_project_once(self):
+        # JavaScript et TypeScript correspondent toutes deux
+        self.assertEqual(list(views.filter_projects(Project.objects.all(), 'script', None)), [self.mobile])
+        projects = views.filter_projects(Project.objects.for_cards(), 'script', None)
+        self.assertEqual([(p.pk, p.tech_count) for p in projects], [(self.mobile.pk, 2)])
+        ranked = search.search('reservation')
+        projects = views.filter_projects(Project.objects.for_cards(), 'script', None, ranked)
+        self.assertEqual([p.pk for p in projects], [self.mobile.pk])
+        response = self.client.get(reverse('projects'), {'tech': 'script', 'search': 'reservation'})
+        self.assertEqual(list(response.context['projects']), [self.mobile])
+
+
+# Désactive l'écriture des visites et des vues pendant la requête mesurée
+@override_settings(VISIT_BUFFER_BATCH_SIZE=10**6, VISIT_BUFFER_FLUSH_INTERVAL=10**6,
+                   PROJECT_VIEWS_FLUSH_INTERVAL=10**6)
+class ProjectCardQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.skills = [Skill.objects.create(name=f'Skill {i}', category='backend') for i in range(6)]
+
+    def setUp(self):
+        cache.clear()
+
+    def create_projects(self, count):
+        for i in range(Project.objects.count(), Project.objects.count() + count):
+            project = Project.objects.create(
+                title=f'Projet {i}', slug=f'projet-{i}', description='Description',
+                detailed_description='<p>Détails</p>', image='projects/p.png', featured=True,
+            )
+            project.technologies.set(self.skills[:i % 6 + 1])
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_for_cards_annotates_tech_count(self):
+        self.create_projects(3)
+        counts = {p.slug: p.tech_count for p in Project.objects.for_cards()}
+        self.assertEqual(counts, {'projet-0': 1, 'projet-1': 2, 'projet-2': 3})
+
+    def test_cards_keep_the_model_ordering(self):
+        for i, (featured, order) in enumerate([(False, 1), (True, 2), (False, 0), (True, 1), (True, 3)]):
+            Project.objects.create(
+                title=f'Ordre {i}', slug=f'ordre-{i}', description='-', detailed_description='-',
+                image='projects/p.png', featured=featured, order=order,
+            )
+        expected = list(Project.objects.values_list('slug', flat=True))
+        self.assertEqual(expected, ['ordre-3', 'ordre-1', 'ordre-4', 'ordre-2', 'ordre-0'])
+
+        self.assertEqual([p.slug for p in Project.objects.for_cards()], expected)
+        response = self.client.get(reverse('home'))
+        self.assertEqual([p.slug for p in response.context['featured_projects']], expected[:3])
+        response = self.client.get(reverse('projects'))
+        self.assertEqual([p.slug for p in response.context['projects']], expected)
+
+    def test_query_count_does_not_depend_on_project_count(self):
+        urls = [reverse('home'), reverse('projects'), reverse('project_detail', args=['projet-0'])]
+        self.create_projects(2)
+        baseline = [self.count_queries(url) for url in urls]
+        self.create_projects(5)
+        self.assertEqual([self.count_queries(url) for url in urls], baseline)
+
+
+class RelatedProjectTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        django, python, react, vue = (
+            Skill.objects.create(name=name, category='backend') for name in ('Django', 'Python', 'React', 'Vue')
+        )
+        cls.skills = {'django': django, 'python': python, 'react': react, 'vue': vue}
+
+        def create(slug, *skills):
+            project = Project.objects.create(
+                title=slug, slug=slug, description='-', detailed_description='-', image='projects/p.png',
+            )
+            project.technologies.add(*skills)
+            return project
+
+        cls.web = create('web', django, python, react)
+        cls.api = create('api', django, python)
+        cls.admin = create('admin', django, vue)
+        cls.front = create('front', vue)
+
+    def scores(self, project):
+        return {
+            entry.related.slug: round(entry.score, 3)
+            for entry in RelatedProject.objects.filter(project=project).select_related('related')
+        }
+
+    def test_jaccard_scores(self):
+        memberships = [(1, 'a'), (1, 'b'), (2, 'a'), (3, 'c')]
+        self.assertEqual(sorted(related.compute_scores(memberships)), [(1, 2, 0.5), (2, 1, 0.5)])
+        self.assertEqual(related.compute_scores(memberships, {3}), [])
+        self.assertEqual(related.jaccard(set(), set()), 0.0)
+
+    def test_index_follows_technologies(self):
+        self.assertEqual(self.scores(self.web), {'api': 0.667, 'admin': 0.25})
+        self.assertEqual(self.scores(self.front), {'admin': 0.5})
+        self.assertEqual(self.scores(self.admin), {'web': 0.25, 'api': 0.333, 'front': 0.5})
+
+    def test_top_related_ordering(self):
+        self.assertEqual(related.top_related(self.admin), [self.front, self.api, self.web])
+        self.assertEqual(related.top_related(self.admin, 1), [self.front])
+        self.assertEqual(async_to_sync(related.atop_related)(self.web, 3), [self.api, self.admin])
+
+    def test_m2m_changes_update_scores(self):
+        self.front.technologies.add(self.skills['python'])
+        self.assertEqual(self.scores(self.front), {'admin': 0.333, 'web': 0.25, 'api': 0.333})
+        self.assertEqual(self.scores(self.web)['front'], 0.25)
+        self.front.technologies.remove(self.skills['vue'])
+        self.assertEqual(self.scores(self.front), {'web': 0.333, 'api': 0.5})
+        self.assertNotIn('front', self.scores(self.admin))
+        self.front.technologies.clear()
+        self.assertEqual(self.scores(self.front), {})
+        self.assertNotIn('front', self.scores(self.api))
+
+    def test_changes_from_the_skill_side(self):
+        self.skills['react'].project_set.add(self.api)
+        self.assertEqual(self.scores(self.web)['api'], 1.0)
+        self.skills['vue'].project_set.clear()
+        self.assertEqual(self.scores(self.admin), {'web': 0.333, 'api': 0.333})
+        self.skills['django'].delete()
+        self.assertEqual(self.scores(self.web), {'api': 1.0})
+        self.assertEqual(self.scores(self.admin), {})
+
+    def test_rebuild_matches_incremental_index(self):
+        expected = {project.slug: self.scores(project) for project in Project.objects.all()}
+        RelatedProject.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_related_projects', stdout=out)
+        self.assertIn('8 paires', out.getvalue())
+        self.assertEqual({project.slug: self.scores(project) for project in Project.objects.all()}, expected)
+
+
+# Petites tables lues en entier par conception, et index de recherche chargé
+# en mémoire une fois par version
+FULL_SCAN_ALLOWED = {
+    'portfolio_skill', 'portfolio_experience', 'portfolio_sitesettings',
+    'portfolio_projectsearchterm',
+}
+
+
+def full_scans(sql, params):
+    """Tables parcourues sans index d'après le plan d'exécution de la requête"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            details = [row[-1] for row in cursor.fetchall()]
+            return {m.group(1) for m in map(re.compile(r'^SCAN (\w+)$').match, details) if m}
+        cursor.execute('EXPLAIN ' + sql, params)
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return {row['table'] for row in rows if row.get('type') == 'ALL'}
+
+
+@skipUnless(connection.vendor in ('sqlite', 'mysql'), "EXPLAIN analysé pour SQLite et MySQL")
+@override_settings(VISIT_BUFFER_BATCH_SIZE=10**6, VISIT_BUFFER_FLUSH_INTERVAL=10**6,
+                   PROJECT_VIEWS_FLUSH_INTERVAL=10**6)
+class QueryPlanTests(TestCase):
+    """Aucune requête des vues ne doit parcourir entièrement une table volumineuse"""
+
+    @classmethod
+    def setUpTestData(cls):
+        interning.clear_caches()
+        skills = [Skill.objects.create(name=f'Skill {i}', category='backend') for i in range(5)]
+        for i in range(30):
+            project = Project.objects.create(
+                title=f'Projet {i}', slug=f'projet-{i}', description='Application web',
+                detailed_description='<p>Django</p>', image='projects/p.png',
+                featured=i % 3 == 0, status=['completed', 'in_progress', 'archived'][i % 3],
+            )
+            project.technologies.set(skills[:i % 5 + 1])
+        Experience.objects.create(company='ACME', position='Dev', description='-',
+                                  start_date=timezone.now().date())
+        for i in range(30):
+            Contact.objects.create(name='A', email='a@example.com', subject='S', message='M', read=i % 2)
+        now = timezone.now()
+        write_visits([
+            Visit('127.0.0.1', 'test', f'/page-{i % 7}/', '', now - timedelta(hours=i))
+            for i in range(500)
+        ])
+        cls.staff = User.objects.create_user('staff', password='pass', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.tables = set(connection.introspection.table_names())
+
+    def assertNoFullScan(self, url, login=False):
+        if login:
+            self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            # Les paramètres sont déjà interpolés dans le SQL capturé
+            scanned = (full_scans(sql, ()) & self.tables) - FULL_SCAN_ALLOWED
+            self.assertFalse(scanned, f"{url} : parcours complet de {scanned}\n{sql}")
+
+    def test_public_views(self):
+        for url in [reverse('home'), reverse('projects'), reverse('projects') + '?status=completed',
+                    reverse('projects') + '?tech=Skill 1', reverse('projects') + '?search=django',
+                    reverse('project_detail', args=['projet-0']), reverse('about')]:
+            self.assertNoFullScan(url)
+
+    def test_dashboard_views(self):
+        for url in [reverse('dashboard'), reverse('api_stats'), reverse('api_chart_data'),
+                    reverse('api_chart_data') + '?days=30&granularity=hour']:
+            self.assertNoFullScan(url, login=True)
+
+
+class VisitRetentionTests(TestCase):
+    def setUp(self):
+        self.addCleanup(interning.clear_caches)
+        self.today = timezone.localdate()
+        self.cutoff = timezone.make_aware(datetime.combine(self.today - timedelta(days=30), datetime.min.time()))
+        noon = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.old_day = self.today - timedelta(days=100)
+        write_visits(
+            [Visit('10.0.0.1', 'Mozilla/5.0', '/', 'a', noon - timedelta(days=100)) for _ in range(3)]
+            + [Visit('10.0.0.2', 'Mozilla/5.0', '/projets/', 'b', self.cutoff - timedelta(seconds=1))]
+            + [Visit('10.0.0.3', 'Mozilla/5.0', '/', 'c', self.cutoff)]
+            + [Visit('10.0.0.4', 'Mozilla/5.0', '/', 'd', noon)]
+        )
+
+    def prune(self, *args):
+        out = io.StringIO()
+        call_command('prune_site_visits', '--days=30', *args, stdout=out)
+        return out.getvalue()
+
+    def daily_total(self, day):
+        return PageVisitDaily.objects.filter(date=day).aggregate(total=Sum('count'))['total']
+
+    def test_prune_cutoff(self):
+        self.assertIn('4 visite(s) purgée(s)', self.prune())
+        self.assertQuerySetEqual(
+            SiteVisit.objects.order_by('timestamp').values_list('ip_address', flat=True),
+            ['10.0.0.3', '10.0.0.4'],
+        )
+        self.assertEqual(self.daily_total(self.old_day), 3)
+
+    def test_dry_run_keeps_visits(self):
+        self.prune('--dry-run')
+        self.assertEqual(SiteVisit.objects.count(), 6)
+
+    def test_prune_completes_missing_rollups(self):
+        PageVisitDaily.objects.filter(date=self.old_day).delete()
+        self.assertIn('Agrégats recalculés pour 1 jour(s)', self.prune())
+        self.assertEqual(self.daily_total(self.old_day), 3)
+
+    def test_backfill_after_prune_keeps_history(self):
+        self.prune()
+        sketches = DailyUniqueSketch.objects.count()
+        call_command('backfill_visit_rollups', stdout=io.StringIO())
+        self.assertEqual(self.daily_total(self.old_day), 3)
+        self.assertEqual(self.daily_total(self.today), 1)
+        self.assertEqual(DailyUniqueSketch.objects.count(), sketches)
+
+
+class InterningTests(TestCase):
+    def setUp(self):
+        self.interner = interning.Interner('PagePath', 'path', 'path_hash')
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = interning.LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c'), len(lru)), (1, 3, 2))
+
+    def test_values_are_stored_once(self):
+        ids = self.interner.ids_for(['/', '/projets/', '/'])
+        self.assertEqual(PagePath.objects.count(), 2)
+        # Valeurs en cache : aucune requête
+        with self.assertNumQueries(0):
+            self.assertEqual(self.interner.ids_for(['/projets/', '/']), ids)
+        # Cache vidé : les lignes existantes sont relues, pas recréées
+        self.interner.cache.clear()
+        self.assertEqual(self.interner.ids_for(['/', '/projets/']), ids)
+        self.assertEqual(PagePath.objects.count(), 2)
+
+    def test_evicted_value_is_read_back(self):
+        self.interner.cache = interning.LRUCache(1)
+        first = self.interner.ids_for(['/a/'])['/a/']
+        self.interner.ids_for(['/b/'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.interner.ids_for(['/a/'])['/a/'], first)
+
+    def test_hash_collision(self):
+        real_hash = interning.value_hash
+
+        def colliding_hash(value, attempt=0):
+            return '0' * 40 if not attempt else real_hash(value, attempt)
+
+        with mock.patch.object(interning, 'value_hash', colliding_hash):
+            ids = self.interner.ids_for(['/a/', '/b/'])
+            self.assertNotEqual(ids['/a/'], ids['/b/'])
+            self.interner.cache.clear()
+            self.assertEqual(self.interner.ids_for(['/b/'])['/b/'], ids['/b/'])
+            self.assertEqual(self.interner.ids_for(['/a/'])['/a/'], ids['/a/'])
+        paths = dict(PagePath.objects.values_list('pk', 'path'))
+        self.assertEqual((paths[ids['/a/']], paths[ids['/b/']]), ('/a/', '/b/'))
+
+
+class VisitFilterTests(SimpleTestCase):
+    BROWSER = benchmark.BROWSER_USER_AGENT
+    CASES = (
+        # (méthode, chemin, statut, en-têtes, motif attendu)
+        ('GET', '/', 200, {}, None),
+        ('GET', '/projets/', 304, {}, None),
+        ('HEAD', '/', 200, {}, 'method'),
+        ('POST', '/contact/', 200, {}, 'method'),
+        ('GET', '/', 302, {}, 'status'),
+        ('GET', '/inconnu/', 404, {}, 'status'),
+        ('GET', '/', 500, {}, 'status'),
+        ('GET', '/admin/portfolio/', 200, {}, 'path'),
+        ('GET', '/static/css/site.css', 200, {}, 'path'),
+        ('GET', '/media/projects/p.png', 200, {}, 'path'),
+        ('GET', '/api/stats/', 200, {}, 'path'),
+        ('GET', '/favicon.ico', 200, {}, 'path'),
+        ('GET', '/', 200, {'HTTP_SEC_PURPOSE': 'prefetch;prerender'}, 'prefetch'),
+        ('GET', '/', 200, {'HTTP_PURPOSE': 'prefetch'}, 'prefetch'),
+        ('GET', '/', 200, {'HTTP_X_MOZ': 'prefetch'}, 'prefetch'),
+        ('GET', '/', 200, {'HTTP_USER_AGENT': ''}, 'bot'),
+        ('GET', '/', 200, {'HTTP_USER_AGENT': 'Mozilla/5.0 (compatible; Googlebot/2.1)'}, 'bot'),
+        ('GET', '/', 200, {'HTTP_USER_AGENT': 'curl/8.4.0'}, 'bot'),
+        ('GET', '/', 200, {'HTTP_USER_AGENT': 'python-requests/2.31'}, 'bot'),
+        ('GET', '/', 200, {'HTTP_USER_AGENT': 'Mozilla/5.0 HeadlessChrome/120.0'}, 'bot'),
+    )
+
+    def classify(self, visit_filter, method, path, status, headers):
+        headers = {'HTTP_USER_AGENT': self.BROWSER, **headers}
+        request = RequestFactory().generic(method, path, **headers)
+        return visit_filter.should_record(request, HttpResponse(status=status))
+
+    def test_rules(self):
+        visit_filter = VisitFilter.from_settings()
+        for method, path, status, headers, reason in self.CASES:
+            with self.subTest(method=method, path=path, status=status, headers=headers):
+                self.assertEqual(self.classify(visit_filter, method, path, status, headers), reason is None)
+
+    def test_counters(self):
+        visit_filter = VisitFilter.from_settings()
+        for method, path, status, headers, _ in self.CASES:
+            self.classify(visit_filter, method, path, status, headers)
+        self.assertEqual(visit_filter.stats(), {
+            'recorded': 2,
+            'skipped': {'method': 2, 'status': 3, 'path': 5, 'prefetch': 3, 'bot': 5},
+        })
+
+    @override_settings(VISIT_IGNORED_PATH_PREFIXES=('/prive/',), VISIT_BOT_USER_AGENT_PATTERNS=('Sonde',))
+    def test_settings_replace_defaults(self):
+        visit_filter = VisitFilter.from_settings()
+        self.assertFalse(self.classify(visit_filter, 'GET', '/prive/page/', 200, {}))
+        self.assertTrue(self.classify(visit_filter, 'GET', '/admin/', 200, {}))
+        self.assertFalse(self.classify(visit_filter, 'GET', '/', 200, {'HTTP_USER_AGENT': 'Ma SONDE 1.0'}))
+        self.assertTrue(self.classify(visit_filter, 'GET', '/', 200, {'HTTP_USER_AGENT': 'curl/8.4.0'}))
+
+
+@override_settings(VISIT_BUFFER_FLUSH_INTERVAL=3600)
+class VisitTrackingStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        visit_buffer.reset()
+        self.addCleanup(visit_buffer.reset)
+        self.addCleanup(interning.clear_caches)
+        self.client.force_login(User.objects.create_user('staff', password='pass', is_staff=True))
+
+    def test_api_stats_exposes_tracking_counters(self):
+        before = self.client.get(reverse('api_stats')).json()['tracking']
+        self.client.get(reverse('about'), headers={'User-Agent': benchmark.BROWSER_USER_AGENT})
+        self.client.get(reverse('about'), headers={'User-Agent': 'Googlebot/2.1'})
+        after = self.client.get(reverse('api_stats')).json()['tracking']
+
+        self.assertEqual(after['filter']['recorded'], before['filter']['recorded'] + 1)
+        self.assertEqual(after['filter']['skipped']['bot'], before['filter']['skipped'].get('bot', 0) + 1)
+        # Les appels à l'API elle-même ne sont pas des visites
+        self.assertEqual(after['filter']['skipped']['path'], before['filter']['skipped'].get('path', 0) + 1)
+        self.assertEqual(after['buffer']['pending'], before['buffer']['pending'] + 1)
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_within_error_bounds(self):
+        sketch = HyperLogLog()
+        sketch.update(f'10.0.{i // 256}.{i % 256}' for i in range(50000))
+        self.assertLess(abs(sketch.count() - 50000), 3 * sketch.standard_error * 50000)
+
+    def test_merge_counts_union_once(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(str(i) for i in range(0, 3000))
+        second.update(str(i) for i in range(2000, 5000))
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        self.assertLess(abs(merged.count() - 5000), 3 * merged.standard_error * 5000)
+
+    def test_unique_totals_from_daily_sketches(self):
+        now = timezone.now()
+        write_visits([
+            Visit(f'10.0.0.{i % 20}', 'Mozilla/5.0', '/', f'session-{i % 30}', now - timedelta(days=i % 3))
+            for i in range(300)
+        ])
+        totals = stats.unique_totals(timezone.localdate(now))
+        self.assertEqual(totals['visitor']['week'], 20)
+        self.assertEqual(totals['session']['week'], 30)
+        self.assertLessEqual(totals['visitor']['today'], totals['visitor']['week'])
+
+
+@override_settings(LIVE_STATS_INTERVAL=0)
+class LiveStatsTests(TestCase):
+    async def test_producer_is_shared_between_subscribers(self):
+        broadcaster = live.StatsBroadcaster()
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        snapshot = await anext(first)
+        self.assertEqual(await anext(second), snapshot)
+        self.assertEqual(snapshot['total_projects'], 0)
+        self.assertEqual(broadcaster.ticks, 1)
+
+        # Rien n'a changé : les ticks suivants n'envoient aucune clé
+        self.assertEqual(await anext(first), {})
+        await first.aclose()
+        await second.aclose()
+        self.assertIsNone(broadcaster._task)
+
+    @override_settings(LIVE_STATS_INTERVAL=0)
+    async def test_producer_survives_snapshot_errors(self):
+        broadcaster = live.StatsBroadcaster()
+        snapshot = {'total_projects': 1}
+        with mock.patch.object(live, 'stats_snapshot', side_effect=[OperationalError('base indisponible'), snapshot]):
+            with self.assertLogs('portfolio.live', 'ERROR'):
+                subscriber = broadcaster.subscribe()
+                self.assertEqual(await anext(subscriber), snapshot)
+        self.assertEqual(broadcaster.ticks, 1)
+        await subscriber.aclose()
+
+    def test_stream_requires_login(self):
+        response = self.client.get(reverse('api_stats_stream'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_stream_is_not_served_under_wsgi(self):
+        self.client.force_login(User.objects.create_user('staff', password='pass', is_staff=True))
+        self.assertEqual(self.client.get(reverse('api_stats_stream')).status_code, 204)
+
+
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=(320, 640))
+class ImageDerivativeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.storage = FileSystemStorage(self.tmp.name, base_url='/media/')
+        buffer = io.BytesIO()
+        images.Image.new('RGBA', (800, 400), (200, 30, 30, 128)).save(buffer, 'PNG')
+        self.name = self.storage.save('projects/photo.png', ContentFile(buffer.getvalue()))
+
+    def test_widths_never_upscale(self):
+        self.assertEqual(images.widths_for(800), [320, 640])
+        self.assertEqual(images.widths_for(500), [320, 500])
+        self.assertEqual(images.widths_for(200), [200])
+
+    def test_derivatives_are_generated(self):
+        manifest = images.generate_derivatives(self.name, self.storage)
+        self.assertEqual((manifest['width'], manifest['height']), (800, 400))
+        self.assertEqual(set(manifest['formats']), set(images.output_formats()))
+        for fmt, entries in manifest['formats'].items():
+            self.assertEqual([w for w, _ in entries], [320, 640])
+            with self.storage.open(entries[0][1]) as f:
+                self.assertEqual(images.Image.open(f).size, (320, 160))
+
+    def test_tag_emits_srcset(self):
+        field_file = Project(image=self.name).image
+        field_file.storage = self.storage
+        template = Template('{% load portfolio_images %}{% responsive_image image alt="Photo" %}')
+        html = template.render(Context({'image': field_file}))
+        self.assertIn('<img src="/media/projects/photo.png"', html)
+
+        images.generate_derivatives(self.name, self.storage)
+        html = template.render(Context({'image': field_file}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('/media/derivatives/projects/photo-320w.jpeg 320w', html)
+        self.assertIn('height="400" loading="lazy" width="800"', html)
+
+
+class ResizedImageTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.storage = FileSystemStorage(tmp.name + '/media')
+        buffer = io.BytesIO()
+        images.Image.new('RGB', (800, 600), 'navy').save(buffer, 'JPEG')
+        self.name = self.storage.save('projects/photo.jpg', ContentFile(buffer.getvalue()))
+        self.cache_dir = tmp.name + '/resized'
+
+    def test_view_resizes_and_serves_immutable(self):
+        with override_settings(MEDIA_ROOT=self.storage.location, RESIZED_IMAGE_CACHE_DIR=self.cache_dir):
+            url = reverse('resized_image', args=[320, 0, self.name])
+            response = self.client.get(url, HTTP_ACCEPT='image/webp,*/*')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/webp')
+            self.assertIn('immutable', response['Cache-Control'])
+            image = images.Image.open(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(image.size, (320, 240))
+
+            response = self.client.get(url, HTTP_ACCEPT='image/webp,*/*', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(self.client.get(reverse('resized_image', args=[320, 0, 'absent.jpg'])).status_code, 404)
+
+    def test_only_allowed_sizes_are_served(self):
+        with override_settings(MEDIA_ROOT=self.storage.location, RESIZED_IMAGE_CACHE_DIR=self.cache_dir):
+            for width, height in ((200, 0), (320, 1), (99999, 0)):
+                url = reverse('resized_image', args=[width, height, self.name])
+                self.assertEqual(self.client.get(url).status_code, 404)
+            with override_settings(RESIZED_IMAGE_SIZES=((200, 100),)):
+                url = reverse('resized_image', args=[200, 100, self.name])
+                self.assertEqual(self.client.get(url).status_code, 200)
+            # Aucune déclinaison n'a été calculée pour les tailles refusées
+            self.assertEqual(len(resizing.ResizeCache()._entries()), 1)
+
+    def test_concurrent_misses_render_once(self):
+        renders = []
+
+        class SlowCache(resizing.ResizeCache):
+            def _render(self, *args):
+                renders.append(args)
+                time.sleep(0.2)
+                return super()._render(*args)
+
+        resize_cache = SlowCache()
+        results = []
+        with override_settings(RESIZED_IMAGE_CACHE_DIR=self.cache_dir):
+            threads = [
+                threading.Thread(target=lambda: results.append(
+                    resize_cache.get(self.name, 100, 100, 'jpeg', self.storage)
+                ))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(renders), 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(resize_cache.stats()['coalesced'], 3)
+
+    def test_cache_size_is_bounded(self):
+        resize_cache = resizing.ResizeCache()
+        with override_settings(RESIZED_IMAGE_CACHE_DIR=self.cache_dir, RESIZED_IMAGE_CACHE_MAX_SIZE=6000):
+            for width in range(100, 400, 20):
+                resize_cache.get(self.name, width, 0, 'jpeg', self.storage)
+            sizes = [p.stat().st_size for p in resize_cache._entries()]
+        self.assertLessEqual(sum(sizes), 6000)
+        self.assertGreater(resize_cache.stats()['evicted'], 0)
+
+
+class MediaServingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name + '/media'
+        storage = FileSystemStorage(self.root)
+        storage.save('docs/notes.txt', ContentFile(b'bonjour ' * 500))
+        storage.save('projects/photo.jpg', ContentFile(b'\xff\xd8' + b'x' * 2000))
+        media_settings = override_settings(MEDIA_ROOT=self.root, MEDIA_CACHE_DIR=tmp.name + '/cache')
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_conditional_and_range_requests(self):
+        response = self.client.get('/media/projects/photo.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('max-age', response['Cache-Control'])
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get('/media/projects/photo.jpg', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get('/media/projects/photo.jpg', HTTP_RANGE='bytes=0-1')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'\xff\xd8')
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/projects/').status_code, 404)
+
+    def test_text_is_gzipped(self):
+        response = self.client.get('/media/docs/notes.txt', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'bonjour ' * 500)
+        self.assertNotIn('Content-Encoding', self.client.get('/media/docs/notes.txt'))
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected/')
+    def test_offload_to_web_server(self):
+        response = self.client.get('/media/projects/photo.jpg')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/projects/photo.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get('/media/projects/photo.jpg', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_offload_encodes_non_ascii_names(self):
+        FileSystemStorage(self.root).save('projects/été 1.jpg', ContentFile(b'\xff\xd8'))
+        url = '/media/projects/%C3%A9t%C3%A9%201.jpg'
+        with override_settings(MEDIA_SERVE_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected/'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/projects/%C3%A9t%C3%A9%201.jpg')
+        with override_settings(MEDIA_SERVE_MODE='x-sendfile'):
+            response = self.client.get(url)
+        self.assertTrue(response['X-Sendfile'].endswith('/media/projects/%C3%A9t%C3%A9%201.jpg'))
+        self.assertTrue(response['X-Sendfile'].isascii())
+
+    def test_precomputed_hashes_are_used(self):
+        call_command('hash_media', stdout=io.StringIO())
+        entry = media.precomputed_hashes()['projects/photo.jpg']
+        response = self.client.get('/media/projects/photo.jpg')
+        self.assertEqual(response['ETag'], f'"{entry[2][:32]}"')
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        # Les identifiants mis en cache disparaissent avec la transaction du test
+        self.addCleanup(interning.clear_caches)
+
+    def test_seed_and_measure_routes(self):
+        benchmark.seed(projects=8, skills=4, experiences=2, visits=500, days=30)
+        self.assertEqual(benchmark.dataset_size()['site_visits'], 500)
+        results = benchmark.run(iterations=3, warmup=0, only=['projects', 'api_stats'])
+        self.assertEqual(set(results), {
+            'projects', 'projects:status', 'projects:tech', 'projects:search', 'projects:page', 'api_stats',
+        })
+        for result in results.values():
+            self.assertEqual(result['status'], 200)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['peak_memory_kb'], 0)
+
+        asgi_results = benchmark.run(iterations=3, warmup=0, only=['about'], asgi=True)
+        self.assertEqual(asgi_results['about']['status'], 200)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for histogram in instrumentation.HISTOGRAMS:
+            histogram.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('about'))
+        timings = dict(part.split(';', 1)[0:2] for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timings), {'db', 'tpl', 'total'})
+        tpl = float(timings['tpl'].split('=')[1])
+        total = float(timings['total'].split('=')[1])
+        self.assertGreater(tpl, 0)
+        self.assertGreaterEqual(total, tpl)
+
+    def test_histograms_by_view(self):
+        self.client.get(reverse('about'))
+        self.client.get(reverse('about'))
+        snapshot = instrumentation.DB_QUERIES.snapshot()
+        labels = (('method', 'GET'), ('view', 'about'))
+        self.assertEqual(snapshot[labels][1], 2)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_access(self):
+        self.client.get(reverse('about'))
+        self.assertEqual(self.client.get(reverse('api_metrics')).status_code, 403)
+        response = self.client.get(reverse('api_metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE portfolio_request_duration_seconds histogram', body)
+        self.assertIn('(processus interrogé uniquement)', body)
+        self.assertIn('portfolio_request_duration_seconds_count{method="GET",status="2xx",view="about"} 1', body)
+        self.assertIn('le="+Inf"', body)
+
+        staff = User.objects.create_user('staff', password='pass', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('api_metrics')).status_code, 200)
+
+
+class QueryCheckTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skill = Skill.objects.create(name='Django', category='backend')
+        for i in range(6):
+            project = Project.objects.create(
+                title=f'Projet {i}', slug=f'projet-{i}', description='Description',
+                detailed_description='<p>Détails</p>', image='projects/p.png', featured=True,
+            )
+            project.technologies.add(skill)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            querycheck.fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'l''a' AND pk IN (1, 2, 3)"),
+            querycheck.fingerprint("SELECT *  FROM t WHERE id = 7 AND name = 'b' AND pk IN (4)"),
+        )
+
+    def test_repeated_query_in_template_loop(self):
+        template = Template(
+            '{% for project in projects %}\n'
+            '{{ project.technologies.all|length }}{% endfor %}'
+        )
+        with querycheck.detect(repeat_threshold=3) as inspector:
+            template.render(Context({'projects': Project.objects.all()}))
+        self.assertEqual(len(inspector.issues), 1)
+        issue = inspector.issues[0]
+        self.assertEqual(issue.count, 6)
+        self.assertTrue(issue.template.endswith(':2'), issue.template)
+        self.assertIn('portfolio_skill', issue.sql)
+        with self.assertRaises(querycheck.QueryIssuesError):
+            inspector.assert_clean()
+
+    @override_settings(QUERY_CHECK='raise', QUERY_CHECK_REPEAT_THRESHOLD=3, QUERY_CHECK_SLOW_MS=10**6,
+                       VISIT_BUFFER_BATCH_SIZE=10**6, VISIT_BUFFER_FLUSH_INTERVAL=10**6,
+                       PROJECT_VIEWS_FLUSH_INTERVAL=10**6)
+    def test_routes_have_no_repeated_queries(self):
+        staff = User.objects.create_user('staff', password='pass', is_staff=True)
+        for url in [reverse('home'), reverse('projects'), reverse('project_detail', args=['projet-0']),
+                    reverse('about')]:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(staff)
+        for url in [reverse('dashboard'), reverse('api_stats'), reverse('api_chart_data') + '?days=30']:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        skill = Skill.objects.create(name='Django', category='backend')
+        Experience.objects.create(
+            company='Agence', position='Développeur', description='<p>Missions</p>',
+            start_date=timezone.now().date(),
+        )
+        for i in range(8):
+            project = Project.objects.create(
+                title=f'Boutique {i}', slug=f'boutique-{i}', description='Boutique en ligne',
+                detailed_description='<p>Détails</p>', image='projects/p.png',
+                status='completed', featured=i < 3,
+            )
+            project.technologies.add(skill)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(interning.clear_caches)
+        self.enterContext(benchmark.use_async_views())
+
+    def test_pages_match_sync_views(self):
+        urls = [
+            reverse('home'), reverse('about'), reverse('projects') + '?page=2',
+            reverse('projects') + '?search=boutique&tech=django',
+            reverse('project_detail', args=['boutique-1']),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.resolver_match.func.__module__, async_views.__name__)
+            cache.clear()
+            with benchmark.use_async_views(False):
+                expected = self.client.get(url)
+            cache.clear()
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.content, expected.content, url)
+        self.assertEqual(self.client.get(reverse('project_detail', args=['inconnu'])).status_code, 404)
+
+    def test_stats_apis(self):
+        self.assertEqual(self.client.get(reverse('api_stats')).status_code, 302)
+        self.client.force_login(User.objects.create_user('staff', password='pass', is_staff=True))
+        self.assertEqual(self.client.get(reverse('api_stats')).json()['total_projects'], 8)
+        response = self.client.get(reverse('api_chart_data'), {'days': 30})
+        self.assertEqual(len(response.json()['data']), 30)
+        self.assertEqual(self.client.get(reverse('api_chart_data'), {'days': 3}).status_code, 400)
+
+    async def test_asgi_middleware_chain(self):
+        recorded = visit_filter.stats()['recorded']
+        views = view_counter.pending('boutique-2')
+        response = await self.async_client.get(
+            reverse('project_detail', args=['boutique-2']),
+            headers={'User-Agent': benchmark.BROWSER_USER_AGENT},
+        )
+        self.assertEqual(response.status_code, 200)
+        # Le SQL exécuté dans le thread de l'ORM asynchrone est bien mesuré
+        queries = int(re.search(r'desc="(\d+) req', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+        self.assertEqual(visit_filter.stats()['recorded'], recorded + 1)
+        self.assertEqual(view_counter.pending('boutique-2'), views + 1)
+
+        with self.settings(QUERY_CHECK='raise', QUERY_CHECK_REPEAT_THRESHOLD=1):
+            with self.assertRaises(querycheck.QueryIssuesError):
+                await self.async_client.get(reverse('about'))
+
+
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            Project.objects.create(
+                title=f'Projet {i}', slug=f'projet-{i}', description='Description',
+                detailed_description='<p>Détails</p>', image='projects/p.png', views=i * 10,
+            )
+        cls.messages = [
+            Contact.objects.create(name=f'Client {i}', email='client@example.com', subject='Devis',
+                                   message='Bonjour', read=i < 2)
+            for i in range(6)
+        ]
+        cls.staff = User.objects.create_user('staff', password='pass', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def test_counts_in_one_query_per_table(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('dashboard'))
+        context = response.context
+        self.assertEqual(context['total_projects'], 7)
+        self.assertEqual((context['total_messages'], context['unread_messages']), (6, 4))
+        self.assertEqual([p.views for p in context['top_projects']], [60, 50, 40, 30, 20])
+        self.assertEqual(len(context['recent_messages']), 5)
+        counts = [query['sql'] for query in captured if 'COUNT(' in query['sql']]
+        self.assertEqual(len(counts), 2)
+
+    def test_payload_is_cached_until_data_changes(self):
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('dashboard'))
+        self.assertFalse([query for query in captured if 'portfolio_' in query['sql']])
+
+        self.client.post(reverse('mark_message_read', args=[self.messages[-1].pk]))
+        self.assertEqual(self.client.get(reverse('dashboard')).context['unread_messages'], 3)
+
+
+class DashboardParallelTests(TransactionTestCase):
+    def test_queries_run_in_worker_threads(self):
+        # bulk_create : pas de génération d'images en arrière-plan
+        Project.objects.bulk_create([Project(
+            title='Projet', slug='projet', description='Description',
+            detailed_description='<p>Détails</p>', image='projects/p.png',
+        )])
+        Contact.objects.create(name='Client', email='client@example.com', subject='Devis', message='Bonjour')
+        with CaptureQueriesContext(connection) as captured:
+            payload = dashboard.collect()
+        self.assertEqual(len(captured), 0)
+        self.assertEqual((payload['total_projects'], payload['unread_messages']), (1, 1))
+        self.assertIn('month', payload['unique_visitors']['visitor'])
+
+    def test_thread_queries_are_measured_and_inspected(self):
+        with querycheck.detect(slow_ms=0) as inspector:
+            with instrumentation.measure(instrumentation.RequestMetrics()) as metrics:
+                dashboard.collect()
+        self.assertGreaterEqual(metrics.db_queries, len(dashboard.QUERIES))
+        self.assertGreater(metrics.db_time, 0)
+        # slow_ms=0 : chaque requête des threads est signalée, avec son origine
+        sources = {issue.source.split(':')[0] for issue in inspector.issues}
+        self.assertIn('portfolio/dashboard.py', sources)
+        self.assertGreaterEqual(len(inspector.issues), len(dashboard.QUERIES))
+
+    def test_pool_follows_worker_setting(self):
+        with override_settings(DASHBOARD_WORKERS=2):
+            dashboard.collect()
+            executor = dashboard._executor
+        with override_settings(DASHBOARD_WORKERS=3):
+            dashboard.collect()
+            self.assertIsNot(dashboard._executor, executor)
+            self.assertEqual(dashboard._executor_workers, 3)
@@ -0,0 +1,226 @@
+"""Pipeline d'ingestion des visites : mise en tampon puis écriture par lots."""
+import atexit
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .background import PeriodicFlush
+
+logger = logging.getLogger(__name__)
+
+# Visite en attente d'écriture (page et user agent en texte brut)
+Visit = namedtuple('Visit', 'ip_address user_agent page session_key timestamp')
+
+
+def write_visits(visits):
+    """Écrit un lot de Visit et met à jour les agrégats dans la même transaction"""
+    from . import interning
+    from .models import SiteVisit
+    from .stats import record_visits
+
+    for attempt in (1, 2):
+        try:
+            with transaction.atomic():
+                page_ids = interning.page_paths.ids_for(v.page for v in visits)
+                agent_ids = interning.user_agents.ids_for(v.user_agent for v in visits)
+                SiteVisit.objects.bulk_create([
+                    SiteVisit(
+                        ip_address=v.ip_address,
+                        user_agent_id=agent_ids[v.user_agent],
+                        page_id=page_ids[v.page],
+                        session_key=v.session_key,
+                        timestamp=v.timestamp,
+                    )
+                    for v in visits
+                ], batch_size=500)
+                record_visits(visits)
+            return
+        except IntegrityError:
+            # Identifiant en cache devenu invalide : on relit les dimensions
+            if attempt == 2:
+                raise
+            interning.clear_caches()
+
+
+# Remplaçables par VISIT_IGNORED_PATH_PREFIXES et VISIT_BOT_USER_AGENT_PATTERNS
+DEFAULT_IGNORED_PATH_PREFIXES = (
+    '/admin/', '/static/', '/media/', '/api/', '/dashboard/',
+    '/favicon.ico', '/robots.txt', '/sitemap.xml', '/health',
+)
+DEFAULT_BOT_USER_AGENT_PATTERNS = (
+    'bot', 'crawl', 'spider', 'slurp', 'scrap', 'preview', 'facebookexternalhit',
+    'curl', 'wget', 'python-requests', 'python-urllib', 'aiohttp', 'go-http-client',
+    'okhttp', 'java/', 'libwww', 'httpclient', 'headless', 'lighthouse',
+    'pingdom', 'uptime', 'monitor', 'statuscake',
+)
+
+
+class VisitFilter:
+    """Décide en quelques microsecondes si une réponse doit être comptée comme visite.
+
+    Les motifs de user agent sont compilés une seule fois en une alternance
+    sensible à la casse, appliquée au user agent en minuscules (bien plus
+    rapide que re.IGNORECASE) ; les préfixes de chemin sont testés avec
+    str.startswith. Les requêtes écartées sont comptées par motif.
+    """
+
+    def __init__(self, ignored_prefixes, bot_patterns):
+        self.ignored_prefixes = tuple(ignored_prefixes)
+        self.bot_re = re.compile('|'.join(re.escape(p.lower()) for p in bot_patterns))
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.skipped = Counter()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            getattr(settings, 'VISIT_IGNORED_PATH_PREFIXES', DEFAULT_IGNORED_PATH_PREFIXES),
+            getattr(settings, 'VISIT_BOT_USER_AGENT_PATTERNS', DEFAULT_BOT_USER_AGENT_PATTERNS),
+        )
+
+    def skip_reason(self, request, response):
+        """Motif pour lequel la requête n'est pas comptée, ou None"""
+        if request.method != 'GET':
+            return 'method'
+        if not (200 <= response.status_code < 300 or response.status_code == 304):
+            return 'status'
+        if request.path.startswith(self.ignored_prefixes):
+            return 'path'
+        meta = request.META
+        if 'prefetch' in (meta.get('HTTP_SEC_PURPOSE') or meta.get('HTTP_PURPOSE') or meta.get('HTTP_X_MOZ') or ''):
+            return 'prefetch'
+        user_agent = meta.get('HTTP_USER_AGENT')
+        if not user_agent or self.bot_re.search(user_agent.lower()):
+            return 'bot'
+        return None
+
+    def should_record(self, request, response):
+        reason = self.skip_reason(request, response)
+        with self._lock:
+            if reason is None:
+                self.recorded += 1
+            else:
+                self.skipped[reason] += 1
+        return reason is None
+
+    def stats(self):
+        with self._lock:
+            return {'recorded': self.recorded, 'skipped': dict(self.skipped)}
+
+
+class VisitBuffer:
+    """Tampon borné de visites, vidé avec bulk_create.
+
+    Le vidage a lieu dès que le lot atteint VISIT_BUFFER_BATCH_SIZE ou que le
+    dernier vidage date de plus de VISIT_BUFFER_FLUSH_INTERVAL secondes. Il est
+    confié au thread d'arrière-plan, qui vide aussi le tampon à intervalle
+    régulier sans attendre de nouvelle visite ; à défaut, il a lieu dans le
+    thread de la requête. Au-delà de VISIT_BUFFER_MAX_SIZE visites en
+    attente, les nouvelles sont ignorées.
+    """
+
+    def __init__(self):
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.flushed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.background = PeriodicFlush('visit-buffer-flush', self.flush, lambda: self.flush_interval)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'VISIT_BUFFER_BATCH_SIZE', 50)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'VISIT_BUFFER_FLUSH_INTERVAL', 10)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'VISIT_BUFFER_MAX_SIZE', 5000)
+
+    def add(self, visit, flush=True):
+        """Met une visite (Visit) en file d'attente ; avec flush=False, l'écriture
+        due (si le thread d'arrière-plan ne s'en charge pas) est laissée à
+        l'appelant et signalée par la valeur renvoyée"""
+        with self._lock:
+            if len(self._pending) >= self.max_size:
+                self.dropped += 1
+                return False
+            self._pending.append(visit)
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        self.background.start()
+        if due and self.background.wake():
+            due = False
+        if due and flush:
+            self.flush()
+        return due
+
+    def flush(self):
+        """Écrit toutes les visites en attente et renvoie leur nombre"""
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+
+        try:
+            write_visits(batch)
+        except Exception:
+            logger.exception("Échec de l'écriture de %d visites", len(batch))
+            self._requeue(batch)
+            return 0
+
+        with self._lock:
+            self.flushed += len(batch)
+            self.batches += 1
+        return len(batch)
+
+    def _requeue(self, batch):
+        # Remet le lot en tête de file sans dépasser la capacité
+        with self._lock:
+            room = max(self.max_size - len(self._pending), 0)
+            kept = batch[-room:] if room else []
+            self.dropped += len(batch) - len(kept)
+            self._pending.extendleft(reversed(kept))
+
+    def reset(self):
+        """Abandonne les visites en attente et remet les compteurs à zéro (tests)"""
+        with self._lock:
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+            self.flushed = self.dropped = self.batches = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'batches': self.batches,
+            }
+
+
+visit_buffer = VisitBuffer()
+visit_filter = VisitFilter.from_settings()
+
+
+def _flush_on_exit():
+    try:
+        visit_buffer.flush()
+    except Exception:
+        logger.exception("Échec du vidage des visites à l'arrêt")
+
+
+# Vide le tampon à l'arrêt du worker (gunicorn, runserver...)
+atexit.register(_flush_on_exit)
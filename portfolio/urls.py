@@ -1,18 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Sous ASGI, les pages publiques et les API de statistiques sont asynchrones
+pages = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', pages.home, name='home'),
     path('accueil/', views.cached_home, name='cached_home'),
-    path('projets/', views.projects, name='projects'),
-    path('projets/<slug:slug>/', views.project_detail, name='project_detail'),
-    path('a-propos/', views.about, name='about'),
+    path('projets/', pages.projects, name='projects'),
+    path('projets/<slug:slug>/', pages.project_detail, name='project_detail'),
+    path('a-propos/', pages.about, name='about'),
     path('contact/', views.contact, name='contact'),
     path('cv/', views.download_cv, name='download_cv'),
+    path('media/resized/<int:width>x<int:height>/<path:path>', views.resized_image, name='resized_image'),
     
     # Dashboard et administration
     path('dashboard/', views.dashboard, name='dashboard'),
-    path('api/stats/', views.api_stats, name='api_stats'),
-    path('api/chart-data/', views.api_chart_data, name='api_chart_data'),
+    path('api/stats/', pages.api_stats, name='api_stats'),
+    path('api/stats/stream/', views.api_stats_stream, name='api_stats_stream'),
+    path('api/chart-data/', pages.api_chart_data, name='api_chart_data'),
+    path('api/metrics/', views.api_metrics, name='api_metrics'),
     path('api/message/<int:message_id>/read/', views.mark_message_read, name='mark_message_read'),
 ]
\ No newline at end of file
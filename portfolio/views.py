@@ -1,16 +1,22 @@
+from django.conf import settings as django_settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q, Avg
-from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.contrib.auth.views import redirect_to_login
+from django.db.models import Case, Q, When
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.core.paginator import Paginator
-from django.core.cache import cache
-from django.views.decorators.cache import cache_page
-from datetime import timedelta
-import json
-from .models import Project, Skill, Experience, Contact, SiteVisit, SiteSettings
-from .forms import ContactForm, ProjectFilterForm
+from django.core.handlers.asgi import ASGIRequest
+import hmac
+from .models import Project, Skill, Experience, Contact
+from .forms import ContactForm
+from . import instrumentation, live, related, search, stats
+from .caching import cache_public_page, get_site_settings
+from .counters import view_counter
+from .dashboard import dashboard_context
+from .fileserving import serve_field_file, serve_file
+from .images import CONTENT_TYPES
+from .resizing import ImageResizeError, negotiate_format, resize_cache
 
 def get_client_ip(request):
     """Récupère l'adresse IP réelle du client"""
@@ -21,46 +27,52 @@ def get_client_ip(request):
         ip = request.META.get('REMOTE_ADDR')
     return ip
 
-def get_site_settings():
-    return SiteSettings.objects.first()
-
+@cache_public_page
 def home(request):
-    settings = get_site_settings()
-    featured_projects = Project.objects.filter(featured=True, status='completed')[:3]
+    featured_projects = Project.objects.for_cards().filter(featured=True, status='completed')[:3]
     skills = Skill.objects.all()
     
     context = {
-        'settings': settings,
         'featured_projects': featured_projects,
         'skills': skills,
     }
     return render(request, 'portfolio/home.html', context)
 
-def projects(request):
-    settings = get_site_settings()
+def filter_projects(projects_list, tech_filter, status_filter, ranked_ids=None):
+    """Applique les filtres de la page projets (ranked_ids : résultats d'une recherche)"""
+    if tech_filter:
+        # Filtrer par technologie (en utilisant le nom de la skill) ; la sous-requête
+        # évite de renvoyer un projet par compétence correspondante
+        projects_list = projects_list.filter(pk__in=Project.technologies.through.objects.filter(
+            skill__name__icontains=tech_filter
+        ).values('project_id'))
     
-    projects_list = Project.objects.filter(
-        Q(status='completed') | Q(status='in_progress')
-    ).prefetch_related('technologies')
+    if status_filter:
+        projects_list = projects_list.filter(status=status_filter)
     
+    if ranked_ids is not None:
+        if ranked_ids:
+            projects_list = projects_list.filter(pk__in=ranked_ids).order_by(
+                Case(*[When(pk=pk, then=position) for position, pk in enumerate(ranked_ids)])
+            )
+        else:
+            projects_list = projects_list.none()
+    return projects_list
+
+@cache_public_page
+def projects(request):
+    projects_list = Project.objects.for_cards().filter(
+        Q(status='completed') | Q(status='in_progress')
+    )
+
     # Filtres simples via GET parameters
     tech_filter = request.GET.get('tech')
     status_filter = request.GET.get('status')
     search_query = request.GET.get('search')
-    
-    if tech_filter:
-        # Filtrer par technologie (en utilisant le nom de la skill)
-        projects_list = projects_list.filter(technologies__name__icontains=tech_filter)
-    
-    if status_filter:
-        projects_list = projects_list.filter(status=status_filter)
-    
-    if search_query:
-        projects_list = projects_list.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(detailed_description__icontains=search_query)
-        ).distinct()
+
+    # Index inversé : résultats triés par pertinence
+    ranked_ids = search.search(search_query) if search_query else None
+    projects_list = filter_projects(projects_list, tech_filter, status_filter, ranked_ids)
     
     # Pagination
     paginator = Paginator(projects_list, 6)  # 6 projets par page
@@ -73,7 +85,6 @@ def projects(request):
     technologies = Skill.objects.all()
     
     context = {
-        'settings': settings,
         'projects': projects,
         'total_projects': total_projects,
         'completed_projects': completed_projects,
@@ -85,29 +96,31 @@ def projects(request):
     return render(request, 'portfolio/projects.html', context)
 
 def project_detail(request, slug):
-    settings = get_site_settings()
-    project = get_object_or_404(Project, slug=slug)
-    project.increment_views()
+    response = _project_detail_page(request, slug)
+    # Compté hors du cache de page, écrit par lots (sans signal ni invalidation)
+    if response.status_code == 200:
+        view_counter.incr(slug)
+    return response
+
+@cache_public_page
+def _project_detail_page(request, slug):
+    project = get_object_or_404(Project.objects.for_cards(), slug=slug)
     
-    related_projects = Project.objects.filter(
-        technologies__in=project.technologies.all()
-    ).exclude(id=project.id).distinct()[:3]
+    related_projects = related.top_related(project, 3)
     
     context = {
-        'settings': settings,
         'project': project,
         'related_projects': related_projects,
     }
     return render(request, 'portfolio/project_detail.html', context)
 
+@cache_public_page
 def about(request):
-    settings = get_site_settings()
     experiences = Experience.objects.all()
     skills = Skill.objects.all()
     total_projects = Project.objects.count()
     
     context = {
-        'settings': settings,
         'experiences': experiences,
         'skills': skills,
         'total_projects': total_projects,
@@ -115,8 +128,6 @@ def about(request):
     return render(request, 'portfolio/about.html', context)
 
 def contact(request):
-    settings = get_site_settings()
-    
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
@@ -137,49 +148,15 @@ def contact(request):
         form = ContactForm()
     
     context = {
-        'settings': settings,
         'form': form,
     }
     return render(request, 'portfolio/contact.html', context)
 
 @login_required
 def dashboard(request):
-    # Statistiques générales
-    total_projects = Project.objects.count()
-    total_messages = Contact.objects.count()
-    unread_messages = Contact.objects.filter(read=False).count()
-    
-    # Statistiques de trafic
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-    
-    visits_today = SiteVisit.objects.filter(timestamp__date=today).count()
-    visits_week = SiteVisit.objects.filter(timestamp__date__gte=week_ago).count()
-    visits_month = SiteVisit.objects.filter(timestamp__date__gte=month_ago).count()
-    
-    # Projets les plus vus
-    top_projects = Project.objects.order_by('-views')[:5]
-    
-    # Messages récents
-    recent_messages = Contact.objects.order_by('-created_at')[:5]
-    
-    # Pages les plus visitées
-    popular_pages = SiteVisit.objects.values('page').annotate(
-        count=Count('page')
-    ).order_by('-count')[:5]
-    
-    context = {
-        'total_projects': total_projects,
-        'total_messages': total_messages,
-        'unread_messages': unread_messages,
-        'visits_today': visits_today,
-        'visits_week': visits_week,
-        'visits_month': visits_month,
-        'top_projects': top_projects,
-        'recent_messages': recent_messages,
-        'popular_pages': popular_pages,
-    }
+    # Comptes groupés par table, requêtes en parallèle, résultat gardé
+    # quelques secondes en cache (DASHBOARD_CACHE_TIMEOUT)
+    context = dashboard_context()
     
     return render(request, 'admin/dashboard.html', context)
 
@@ -187,47 +164,110 @@ def dashboard(request):
 @login_required
 def api_stats(request):
     """API pour récupérer les statistiques en temps réel"""
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    
-    stats = {
-        'visits_today': SiteVisit.objects.filter(timestamp__date=today).count(),
-        'visits_week': SiteVisit.objects.filter(timestamp__date__gte=week_ago).count(),
-        'unread_messages': Contact.objects.filter(read=False).count(),
-        'total_projects': Project.objects.count(),
-    }
+    data = live.stats_snapshot()
     
-    return JsonResponse(stats)
+    return JsonResponse(data)
+
+async def api_stats_stream(request):
+    """Flux SSE des statistiques (deltas poussés par un producteur partagé)"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    # Sous WSGI, le flux infini immobiliserait un worker : 204 indique à
+    # EventSource de ne pas se reconnecter
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(live.event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Désactive la mise en tampon de nginx pour ce flux
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def api_metrics(request):
+    """Métriques des requêtes au format Prometheus (staff ou jeton METRICS_TOKEN).
+
+    Les histogrammes sont ceux du seul processus qui répond.
+    """
+    token = django_settings.METRICS_TOKEN
+    authorized = request.user.is_staff or (
+        token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not authorized:
+        return HttpResponse(status=403)
+
+    return HttpResponse(
+        instrumentation.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
 
 @login_required
 def api_chart_data(request):
-    """API pour les données de graphiques"""
-    days = 7
-    dates = []
-    visits = []
-    
-    for i in range(days):
-        date = (timezone.now().date() - timedelta(days=i))
-        dates.append(date.strftime('%d/%m'))
-        visit_count = SiteVisit.objects.filter(timestamp__date=date).count()
-        visits.append(visit_count)
+    """API pour les données de graphiques (?days=7|30|90|365&granularity=day|hour)"""
+    params = chart_params(request)
+    if params is None:
+        return JsonResponse({'error': 'Paramètres invalides'}, status=400)
+
+    return chart_response(stats.visit_series(*params), params[1])
+
+def chart_params(request):
+    """(jours, granularité) demandés, ou None s'ils sont invalides"""
+    try:
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        return None
+    granularity = request.GET.get('granularity', 'day')
+    if days not in stats.CHART_WINDOWS or granularity not in stats.CHART_GRANULARITIES:
+        return None
+    return days, granularity
+
+def chart_response(series, granularity):
+    label_format = '%d/%m %Hh' if granularity == 'hour' else '%d/%m'
     
     return JsonResponse({
-        'labels': list(reversed(dates)),
-        'data': list(reversed(visits))
+        'labels': [bucket.strftime(label_format) for bucket, _ in series],
+        'data': [count for _, count in series],
     })
 
 def download_cv(request):
     """Télécharger le CV"""
-    settings = get_site_settings()
+    settings = get_site_settings(request)
     if settings and settings.resume_file:
-        response = HttpResponse(settings.resume_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="CV_{settings.name.replace(" ", "_")}.pdf"'
-        return response
+        return serve_field_file(
+            request,
+            settings.resume_file,
+            content_type='application/pdf',
+            filename=f'CV_{settings.name.replace(" ", "_")}.pdf',
+            as_attachment=True,
+            cache_max_size=django_settings.CV_CACHE_MAX_SIZE,
+        )
     else:
         messages.error(request, 'CV non disponible')
         return redirect('home')
 
+def resized_image(request, width, height, path):
+    """Image des médias redimensionnée à la demande (hauteur 0 : proportionnelle)"""
+    # Tailles autorisées uniquement : pas d'encodage ni de cache pour des tailles arbitraires
+    if (width, height) not in django_settings.RESIZED_IMAGE_SIZES:
+        raise Http404
+
+    fmt = negotiate_format(request.META.get('HTTP_ACCEPT', ''))
+    try:
+        cached = resize_cache.get(path, width, height, fmt)
+        size = cached.stat().st_size
+    except FileNotFoundError:
+        # Évincé entre-temps : produit à nouveau
+        cached = resize_cache.get(path, width, height, fmt)
+        size = cached.stat().st_size
+    except ImageResizeError:
+        raise Http404
+
+    # Le nom du fichier en cache dépend de la version de l'original
+    return serve_file(
+        request, lambda: open(cached, 'rb'), size, CONTENT_TYPES[fmt], f'"{cached.stem}"',
+        extra_headers={'Cache-Control': 'public, max-age=31536000, immutable', 'Vary': 'Accept'},
+    )
+
 # Vue pour marquer un message comme lu (AJAX)
 @login_required
 def mark_message_read(request, message_id):
@@ -241,7 +281,6 @@ def mark_message_read(request, message_id):
     
     return JsonResponse({'success': False, 'error': 'Méthode non autorisée'})
 
-# Vue cache pour la page d'accueil (amélioration des performances)
-@cache_page(60 * 15)  # Cache pendant 15 minutes
+# Ancienne URL de la page d'accueil en cache (home est désormais mise en cache)
 def cached_home(request):
     return home(request)
\ No newline at end of file
@@ -33,8 +33,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'portfolio.instrumentation.RequestTimingMiddleware',
+    'portfolio.querycheck.QueryCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, utilisable aussi sans thread sous ASGI
+    'portfolio.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -48,7 +51,8 @@ ROOT_URLCONF = 'portfolio_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates avec mesure du temps de rendu (Server-Timing, métriques)
+        'BACKEND': 'portfolio.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -57,6 +61,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'portfolio.context_processors.site_settings',
             ],
         },
     },
@@ -99,9 +104,28 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Envoi des médias : 'django', 'x-accel' (nginx) ou 'x-sendfile' (Apache)
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 3600))
+MEDIA_CACHE_DIR = BASE_DIR / 'cache' / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Déclinaisons responsives des images (largeurs en pixels, threads de génération)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+IMAGE_DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', 2))
+
+# Redimensionnement à la demande (/media/resized/<l>x<h>/...) et cache disque LRU.
+# Seules ces tailles (largeur, hauteur ; 0 = proportionnelle) sont servies : le
+# nombre de déclinaisons qu'un visiteur peut faire calculer reste borné
+RESIZED_IMAGE_SIZES = tuple((width, 0) for width in IMAGE_DERIVATIVE_WIDTHS)
+RESIZED_IMAGE_CACHE_DIR = BASE_DIR / 'cache' / 'resized'
+RESIZED_IMAGE_CACHE_MAX_SIZE = int(os.getenv('RESIZED_IMAGE_CACHE_MAX_SIZE', 200 * 1024 * 1024))
+
+# Taille max (octets) du CV gardé en cache pour /cv/ (0 = désactivé)
+CV_CACHE_MAX_SIZE = int(os.getenv('CV_CACHE_MAX_SIZE', 0))
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
@@ -122,6 +146,10 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', EMAIL_HOST_USER)
 
+# File d'envoi des emails (commande send_queued_mail)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 60))
+
 # Messages Framework
 from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
@@ -132,13 +160,66 @@ MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
 
-# Cache
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache : partagé entre les processus si REDIS_URL est défini (paquet redis
+# requis), sinon propre à chaque processus
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+
+# Suivi des visites : écriture groupée des SiteVisit
+VISIT_BUFFER_BATCH_SIZE = int(os.getenv('VISIT_BUFFER_BATCH_SIZE', 50))
+VISIT_BUFFER_FLUSH_INTERVAL = int(os.getenv('VISIT_BUFFER_FLUSH_INTERVAL', 10))
+VISIT_BUFFER_MAX_SIZE = int(os.getenv('VISIT_BUFFER_MAX_SIZE', 5000))
+# Cache LRU des chemins/user agents déjà enregistrés (par processus)
+VISIT_INTERNING_CACHE_SIZE = int(os.getenv('VISIT_INTERNING_CACHE_SIZE', 10000))
+# Jours de visites brutes conservés (commande prune_site_visits)
+SITE_VISIT_RETENTION_DAYS = int(os.getenv('SITE_VISIT_RETENTION_DAYS', 90))
+
+# Écriture groupée des vues de projets (secondes, 0 = immédiate)
+PROJECT_VIEWS_FLUSH_INTERVAL = int(os.getenv('PROJECT_VIEWS_FLUSH_INTERVAL', 30))
+# Thread d'arrière-plan écrivant les tampons en attente sans attendre la requête suivante
+BUFFER_FLUSH_THREAD = os.getenv('BUFFER_FLUSH_THREAD', 'True') == 'True'
+
+# Cache des pages publiques, invalidé à chaque modification du contenu. Sans
+# cache partagé, les autres workers ne voient pas l'invalidation : l'expiration
+# (secondes) borne alors la durée pendant laquelle ils servent une page périmée.
+# Avec Redis, elle libère les pages des générations passées
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 3600 if REDIS_URL else 60))
+# Limite pour la copie de SiteSettings gardée par chaque processus (sans Redis)
+SITE_SETTINGS_CACHE_TIMEOUT = None if REDIS_URL else int(os.getenv('SITE_SETTINGS_CACHE_TIMEOUT', 60))
+
+# Instrumentation : en-tête Server-Timing et jeton d'accès à api/metrics/ (Prometheus)
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Détection des requêtes N+1 et lentes : 'off', 'log' ou 'raise' (échec des tests)
+QUERY_CHECK = os.getenv('QUERY_CHECK', 'log' if DEBUG else 'off')
+QUERY_CHECK_REPEAT_THRESHOLD = int(os.getenv('QUERY_CHECK_REPEAT_THRESHOLD', 5))
+QUERY_CHECK_SLOW_MS = int(os.getenv('QUERY_CHECK_SLOW_MS', 100))
+
+# Intervalle (secondes) du flux temps réel des statistiques (api/stats/stream/, ASGI)
+LIVE_STATS_INTERVAL = int(os.getenv('LIVE_STATS_INTERVAL', 5))
+
+# Dashboard : threads interrogeant les tables en parallèle (1 = séquentiel) et
+# durée (secondes) du cache des données assemblées. Chaque thread garde sa
+# connexion (CONN_MAX_AGE) : prévoir DASHBOARD_WORKERS connexions de plus par processus
+DASHBOARD_WORKERS = int(os.getenv('DASHBOARD_WORKERS', 4))
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 10))
+
+# Pages publiques et API de statistiques en vues asynchrones (serveur ASGI)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
 
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)